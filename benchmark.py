@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+
+import itertools
+import random
+import time
+import json
+import os
+import sys
+import tempfile
+import argparse
+import tracemalloc
+
+import numpy as np
+
+from schedule_generator import credit_combinations, read_csv, ScheduleGenerator, Pipeline, Ranking, Schedule
+
+# Compares how long it takes to find the credit-feasible combinations of flexible courses
+# as the number of flexible courses grows: every subset from itertools.combinations() against credit_combinations().
+# Also times each stage of generating schedules from synthetic catalogs of different sizes, see benchmark_stages(),
+# and measures how much memory a schedule takes as an object and as a row of a table, see benchmark_memory().
+
+def every_subset(credits, low, high):
+    '''The way generate_schedules() used to do it, trying all 2^n subsets and throwing most of them away.'''
+    for n in range(0, len(credits) + 1):
+        for element in itertools.combinations(range(len(credits)), n):
+            total = sum([credits[f] for f in element])
+            if total >= low and total <= high:
+                yield element
+
+def benchmark_combinations(sizes=range(8, 31, 2), low=12, high=18, brute_force_limit=22, seed=0):
+    '''Print a table of subset-generation times, in seconds, for each number of flexible courses.
+    Trying every subset gets slow quickly, so it's skipped past brute_force_limit courses.'''
+    random.seed(seed)
+    print('courses\tfeasible\tevery subset\tcredit_combinations')
+    for n in sizes:
+        credits = [random.choice([1, 3, 3, 3, 4, 4.5]) for f in range(n)]
+
+        start = time.perf_counter()
+        feasible = sum(1 for f in credit_combinations(credits, low, high))
+        pruned_time = time.perf_counter() - start
+
+        brute_time = '-'
+        if n <= brute_force_limit:
+            start = time.perf_counter()
+            assert sum(1 for f in every_subset(credits, low, high)) == feasible
+            brute_time = str(round(time.perf_counter() - start, 4))
+
+        print(str(n) + '\t' + str(feasible) + '\t' + brute_time + '\t' + str(round(pruned_time, 4)))
+
+def time_label(minutes):
+    '''Given minutes since midnight, return a time like '8:10AM', as the input CSV has them.'''
+    hours = minutes // 60
+    return str((hours - 1) % 12 + 1) + ':' + str(minutes % 60).zfill(2) + ('AM' if hours < 12 else 'PM')
+
+def synthetic_catalog(path, courses=10, sections=6, required=0.2, credits=(3, 3, 3, 4), labs=0.3, slots=24, seed=0):
+    '''Write a made-up input CSV to path, in the tab-separated format read_csv() takes.
+    Each course has a lecture coreq, with credits picked from credits, and with probability labs a 1 credit lab coreq as well.
+    Each coreq has between sections / 2 and sections sections, and the first required fraction of the courses are required.
+    Sections start at one of slots evenly spaced times between 8 AM and 8 PM, so fewer slots means more collisions.'''
+    random.seed(seed)
+    patterns = ['MoWe', 'TuTh', 'MoWeFr', 'MoTh', 'TuFr', 'Mo', 'We', 'Fr', 'Sa']
+    starts = [8 * 60 + round(f * 12 * 60 / max(slots - 1, 1) / 5) * 5 for f in range(slots)]
+    lines = ['Corequisites?\tRequired?\tCourse code\tCourse name\tSection\tDays and times\tCredits']
+    for n in range(courses):
+        coreqs = [('C' + str(n).zfill(3) + ' LEC', random.choice(credits))]
+        if random.random() < labs:
+            coreqs.append(('C' + str(n).zfill(3) + ' LAB', 1))
+        for m, (code, credit) in enumerate(coreqs):
+            for x in range(random.randint(max(sections // 2, 1), sections)):
+                start = random.choice(starts)
+                days_and_times = random.choice(patterns) + ' ' + time_label(start) + ' - ' + time_label(start + random.choice([50, 75, 110]))
+                first = m == 0 and x == 0
+                lines.append('\t'.join(['c' if first else '', 'r' if first and n < required * courses else '',
+                                        code, 'Course ' + str(n), str(x + 1).zfill(2) + '-' + code[-3:], days_and_times, str(credit)]))
+    with open(path, 'w', encoding='utf-8') as output_file:
+        output_file.write('\n'.join(lines) + '\n')
+
+def benchmark_stages(path, min_credits, max_credits, k=10, pipeline=None, render=True):
+    '''Generate schedules from the input CSV at path the way generate_schedules() does, timing each stage separately.
+    Returns a dict of the counts of what was found and of the seconds spent in each stage.'''
+    if pipeline is None:
+        pipeline = Pipeline()
+    seconds = {}
+    start = time.perf_counter()
+    rows = read_csv(path)
+    seconds['read'] = time.perf_counter() - start
+
+    # parsing the sections and indexing which ones conflict
+    start = time.perf_counter()
+    generator = ScheduleGenerator(rows)
+    seconds['parse'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    combinations = list(generator.combinations(min_credits, max_credits))
+    seconds['subsets'] = time.perf_counter() - start
+
+    # the rest happens one combination at a time, as in ScheduleGenerator.rank(), so its stages are timed in pieces
+    for stage in ['search', 'score', 'filter', 'rank']:
+        seconds[stage] = 0
+    blocked = pipeline.blocked_sections(generator)
+    preferred = Ranking(k)
+    undesirable = Ranking(k, reverse=True)
+    found = 0
+    kept = 0
+    for number, credits, coreqs in combinations:
+        # the search leaves out the conflicts, along with anything else the filters can rule out from the sections alone
+        start = time.perf_counter()
+        chunk = np.array(list(generator.search(coreqs, blocked=blocked.tolist(), **pipeline.search_options())), dtype=int)
+        seconds['search'] += time.perf_counter() - start
+        if len(chunk) == 0:
+            continue
+        found += len(chunk)
+
+        start = time.perf_counter()
+        metrics = generator.score(chunk)
+        seconds['score'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        table = dict(metrics, sections=chunk, credits=np.full(len(chunk), float(credits)))
+        rows = pipeline.keep(table, blocked)
+        seconds['filter'] += time.perf_counter() - start
+        kept += len(rows)
+
+        start = time.perf_counter()
+        keys = pipeline.key(table, rows)
+        for x, n in enumerate(rows.tolist()):
+            row = tuple(chunk[n].tolist())
+            make_payload = lambda: (row, credits, {name: metrics[name][n].item() for name in metrics})
+            preferred.offer(keys[x].item(), (number, row), make_payload)
+            undesirable.offer(keys[x].item(), (number, row), make_payload)
+        seconds['rank'] += time.perf_counter() - start
+
+    seconds['render'] = None
+    if render:
+        start = time.perf_counter()
+        named = [('preferred ' + str(x).zfill(2), generator.make_schedule(f)) for x, f in enumerate(preferred.results())]
+        named += [('undesirable ' + str(x + 1).zfill(2), generator.make_schedule(f)) for x, f in enumerate(undesirable.results())]
+        with tempfile.TemporaryDirectory() as output_dir:
+            generator.save_images(named, output_dir)
+        seconds['render'] = time.perf_counter() - start
+
+    counts = {'sections': len(generator.sections), 'combinations': len(combinations), 'schedules': found, 'kept': kept,
+              'nodes expanded': generator.nodes_expanded}
+    return {'counts': counts, 'seconds': seconds}
+
+def benchmark_catalogs(courses=(8, 10, 12, 14), sections=(6,), slots=(24,), required=0.2, labs=0.3, min_credits=12, max_credits=18,
+                       seeds=(0,), render=True):
+    '''Time the stages of benchmark_stages() on a synthetic catalog for every combination of the given sizes and seeds.
+    Returns a report to save as JSON, with the settings and results of each run.'''
+    report = {'python': sys.version.split()[0], 'numpy': np.__version__, 'runs': []}
+    with tempfile.TemporaryDirectory() as directory:
+        for course_count, section_count, slot_count, seed in itertools.product(courses, sections, slots, seeds):
+            settings = {'courses': course_count, 'sections': section_count, 'required': required, 'labs': labs, 'slots': slot_count,
+                        'min_credits': min_credits, 'max_credits': max_credits, 'seed': seed}
+            path = os.path.join(directory, 'catalog.csv')
+            synthetic_catalog(path, course_count, section_count, required, labs=labs, slots=slot_count, seed=seed)
+            result = benchmark_stages(path, min_credits, max_credits, render=render)
+            result['settings'] = settings
+            report['runs'].append(result)
+            print(json.dumps(settings) + '\t' + str(round(sum([f for f in result['seconds'].values() if f is not None]), 3)) + ' s', file=sys.stderr)
+    return report
+
+def benchmark_memory(count=20000, courses=12, min_credits=12, max_credits=18, seed=0):
+    '''Measure the bytes each schedule takes as a Schedule object with its properties calculated,
+    against a row of the table from ScheduleGenerator.schedule_table(), on up to count schedules of a synthetic catalog.
+    The Section and Block objects are shared by every schedule, so they're counted separately, per object.'''
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'catalog.csv')
+        synthetic_catalog(path, courses, seed=seed)
+        generator = ScheduleGenerator(read_csv(path))
+    table = generator.schedule_table(min_credits, max_credits)
+    rows = [tuple(f[f >= 0].tolist()) for f in table['sections'][:count]]
+
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    schedules = []
+    for row in rows:
+        schedule = Schedule(tuple(generator.sections[f] for f in row))
+        schedule.calculate()
+        schedules.append(schedule)
+    object_bytes = (tracemalloc.get_traced_memory()[0] - start) / len(schedules)
+    tracemalloc.stop()
+
+    sections = generator.sections
+    blocks = [f for section in sections for f in section.blocks]
+    return {'schedules': len(schedules),
+            'bytes per Schedule object': round(object_bytes, 1),
+            'bytes per table row': sum([f.itemsize * (f.size // max(len(f), 1)) for f in table.values()]),
+            'bytes per Section object': round(attribute_bytes(sections) / len(sections), 1),
+            'bytes per Block object': round(attribute_bytes(blocks) / len(blocks), 1)}
+
+def attribute_bytes(objects):
+    '''Bytes taken by the objects and the values of their attributes, like a Section's mask int,
+    counting each value once even when several objects share it.'''
+    sizes = {}
+    for f in objects:
+        sizes[id(f)] = sys.getsizeof(f)
+        if hasattr(f, '__dict__'):
+            # an object without __slots__ keeps its attributes in a dict of its own
+            sizes[id(f.__dict__)] = sys.getsizeof(f.__dict__)
+            values = list(f.__dict__.values())
+        else:
+            values = [getattr(f, name) for name in type(f).__slots__ if hasattr(f, name)]
+        for value in values:
+            sizes[id(value)] = sys.getsizeof(value)
+    return sum(sizes.values())
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time how generating schedules scales with the size of the catalog.')
+    parser.add_argument('--combinations', action='store_true', help='compare the ways of finding credit-feasible combinations instead')
+    parser.add_argument('--memory', action='store_true', help='measure the bytes per schedule as objects and as table rows instead')
+    parser.add_argument('--courses', type=int, nargs='+', default=[8, 10, 12, 14], help='numbers of courses to try (default %(default)s)')
+    parser.add_argument('--sections', type=int, nargs='+', default=[6], help='most sections per coreq to try (default %(default)s)')
+    parser.add_argument('--slots', type=int, nargs='+', default=[24], help='numbers of distinct start times to try (default %(default)s)')
+    parser.add_argument('--required', type=float, default=0.2, help='fraction of the courses that are required (default %(default)s)')
+    parser.add_argument('--labs', type=float, default=0.3, help='chance that a course has a lab coreq (default %(default)s)')
+    parser.add_argument('--min-credits', type=float, default=12, help='fewest credits a schedule may have (default %(default)s)')
+    parser.add_argument('--max-credits', type=float, default=18, help='most credits a schedule may have (default %(default)s)')
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0], help='catalogs to generate for each size (default %(default)s)')
+    parser.add_argument('--no-render', action='store_true', help='skip drawing the images')
+    parser.add_argument('--report', help='save the JSON report here instead of printing it')
+    args = parser.parse_args()
+
+    if args.combinations:
+        benchmark_combinations()
+        sys.exit()
+    if args.memory:
+        print(json.dumps(benchmark_memory(), indent=2))
+        sys.exit()
+    report = benchmark_catalogs(args.courses, args.sections, args.slots, args.required, args.labs, args.min_credits, args.max_credits,
+                                args.seeds, not args.no_render)
+    if args.report is not None:
+        with open(args.report, 'w', encoding='utf-8') as report_file:
+            json.dump(report, report_file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
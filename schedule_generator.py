@@ -13,10 +13,20 @@ import random
 import numpy as np
 
 import itertools
+import copy
+import functools
+import heapq
+import math
+import tracemalloc
+import argparse
+import hashlib
+import json
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 
 # This program assumes no classes start on one day and end the next day!
 # It also assumes that the night between Sunday and Monday will be a restful one, and ignores it.
-# If a class has two different meeting times on two different days, this program will raise a flag. Not yet able to parse those.
+# If a class has two different meeting times on two different days, list both in its 'Days and times', e.g. 'MoWe 8:10AM - 9:25AM Fr 1:00PM - 2:15PM'
 # MAKE SURE that when you're comparing schedules, they're comparable! ie. similar number of credits
 
 current_time = datetime.now().strftime('%Y-%m-%d %H-%M-%S')
@@ -27,13 +37,73 @@ OUTPUT_DIR = '_output schedules ' + current_time
 MIN_CREDITS = 16
 MAX_CREDITS = 16
 
+# conflict-free schedules found for an input are kept here, see ScheduleGenerator.cached_table()
+CACHE_DIR = '_cache'
+CACHE_MAX_BYTES = 1024 ** 3
+CACHE_VERSION = 3   # bump whenever the tables saved change, so old ones are never loaded
+
+WEEKDAYS = ['Mo', 'Tu', 'We', 'Th', 'Fr', 'Sa', 'Su']
+
+@functools.lru_cache(maxsize=None)
+def parse_time(string):
+    '''Given a time of form '8:10AM', return the minutes since midnight.'''
+    hours, minutes = string[:-2].split(':')
+    ampm = string[-2:].upper()
+    if ampm not in ['AM', 'PM'] or not 1 <= int(hours) <= 12 or len(minutes) != 2 or not 0 <= int(minutes) <= 59:
+        raise ValueError('Not a time of form 8:10AM: ' + string)
+    return (int(hours) % 12 + (12 if ampm == 'PM' else 0)) * 60 + int(minutes)
+
+@functools.lru_cache(maxsize=None)
+def parse_days_and_times(string):
+    '''Given a 'Days and times' string of form 'MoTh 8:10AM - 9:25AM',
+    return a tuple of (date, start, end) for each meeting, with Monday as date 1 and times in minutes since midnight.
+    Classes meeting at different times on different days can list one days-and-times pattern after another,
+    e.g. 'MoWe 8:10AM - 9:25AM Fr 1:00PM - 2:15PM', optionally separated by commas or semicolons.'''
+    split = string.replace(',', ' ').replace(';', ' ').split()
+    assert len(split) > 0 and len(split) % 4 == 0, "We have a class with a nonstandard 'Days and times' string format! " + string
+    output = []
+    for n in range(0, len(split), 4):
+        days, start, dash, end = split[n:n + 4]
+        assert dash == '-' and len(days) % 2 == 0, "We have a class with a nonstandard 'Days and times' string format! " + string
+        start = parse_time(start)
+        end = parse_time(end)
+        assert end > start, "\nThe end time is before the start time! " + string
+        for m in range(0, len(days), 2):   # for weekdays in the weekdays string
+            output.append((WEEKDAYS.index(days[m:m + 2]) + 1, start, end))
+    return tuple(output)
+
+def gaussian(minutes):
+    '''Given minutes past 8:00AM, as a number or a NumPy array, return how close that is to 1 PM.'''
+    # 8 AM to 1 PM to 6 PM
+    mu = 0
+    sig = 1
+    x = -3 + (minutes / 600) * 6
+    return np.exp(-np.power(x - mu, 2.) / (2 * np.power(sig, 2.))) - 0.25
+
+def night_travel(minutes):
+    '''Given when a day's last class ends, in minutes since midnight, as a number or a NumPy array,
+    return the extra travel time that day for getting home late.'''
+    # the usual 2 hours of travel a day are an hour each way, and the trip home after a class ending past 8 PM
+    # takes 2 hours instead of 1, so a smooth step centered on 8 PM from no extra time before 7 PM to an extra hour after 9 PM
+    return 60 / (1 + np.exp(-(minutes - 20 * 60) / 15))
+
+def minute_mask(date, start, end):
+    '''Return an int with one bit for every minute of the week from start to end on date, see parse_days_and_times().'''
+    # including the end minute, so that a block ending at 9:25AM still collides with one starting at 9:25AM, as in Block.__eq__()
+    first = (date - 1) * 24 * 60 + start
+    last = (date - 1) * 24 * 60 + end
+    return ((1 << (last - first + 1)) - 1) << first
+
 class Block:
+    # there's one of these for every meeting of every section, so they're kept small
+    __slots__ = ('date', 'start', 'end', 'duration', 'course_code')
+
     def __init__(self, date, start, end, course_code):
         self.date = date  # Monday is 1, Sunday is 7
-        self.start = start
+        self.start = start  # minutes since midnight, see parse_days_and_times()
         self.end = end
         # print(day, start, end)
-        self.duration = (end - start).seconds / 60
+        self.duration = end - start
         self.course_code = course_code
 
     def __eq__(self, other):
@@ -48,12 +118,15 @@ class Block:
             return False
 
     def __str__(self):
-        return self.start
+        return WEEKDAYS[self.date - 1] + ' ' + str(self.start) + ' - ' + str(self.end)
 
     def __gt__(self, other):
         return self.start > other.start
 
 class Section:
+    __slots__ = ('section', 'days_and_times', 'credits', 'course_code', 'course_name', 'blocks', 'index', 'alternates', 'mask',
+                 'saturday', 'early_morns', 'late_nights')
+
     def __init__(self, section_dict, credits, course_code, course_name):
         self.section = section_dict['Section']
         self.days_and_times = section_dict['Days and times']
@@ -65,46 +138,56 @@ class Section:
 
         self.blocks = []
         # print(section_dict)
-        
+
         # 'MoWeTh 12:10PM - 1:00PM'
-        # ? how to handle strings with different times on different days?
-        split = section_dict['Days and times'].split(' ')
-        assert len(split) == 4, "We have a class with a nonstandard 'Days and times' string format! " + section_dict
-        for n in range(int(len(split[0]) / 2)): # for weekdays in the weekdays string
-            # the month date needs to start on a 1, and it happens to be a Monday in January of 1900
-            date = ['Mo', 'Tu', 'We', 'Th', 'Fr', 'Sa', 'Su'].index(split[0][n * 2:(n + 1)*2]) + 1
-            # Be careful! All these datetime objects have the same default year and month! Dates are 1 for Monday and 6 for Saturday.
-            start = datetime.strptime(str(date) + ' ' + split[1], '%d %I:%M%p')
-            end   = datetime.strptime(str(date) + ' ' + split[3], '%d %I:%M%p')
-            # print(datetime.strftime(start, '%d %w %I:%M%p %Y-%m-%d'))
-            assert end > start, "\nThe end time is before the start time! " + datetime.strftime(start, '%H:%M') + ' ' + datetime.strftime(end, '%H:%M')
+        for date, start, end in parse_days_and_times(self.days_and_times):
             self.blocks.append(Block(date, start, end, self.course_code))
 
+        self.index = None   # position in ScheduleGenerator.sections
+        self.alternates = []    # section numbers of other sections meeting at the same times, see Coreq
+        # one bit for every minute of the week that the section occupies
+        self.mask = 0
+        for block in self.blocks:
+            self.mask |= minute_mask(block.date, block.start, block.end)
+
+        # these are used to prune the search early, see ScheduleGenerator.search()
+        self.saturday = any(block.date == 6 for block in self.blocks)
+        self.early_morns = frozenset(block.date for block in self.blocks if block.start <= 9 * 60)
+        self.late_nights = frozenset(block.date for block in self.blocks if block.end >= 17 * 60)
+
     def __eq__(self, other):    # if the section collides with another section, return True
-        for block1 in self.blocks:
-            for block2 in other.blocks:
-                if block1 == block2:
-                    return True
-        return False
+        return self.mask & other.mask != 0
 
     def __str__(self):
-        return self.course_code + ' ' + self.course_name + ' ' + self.section
+        return self.course_code + ' ' + self.course_name + ' ' + ' / '.join([self.section] + self.alternates)
             
 class Coreq:
-    def __init__(self, sections_list):
+    def __init__(self, sections_list, catalog=None):
         self.course_code = sections_list[0]['Course code']
         self.course_name = sections_list[0]['Course name']
         self.credits = float(sections_list[0]['Credits'])
         self.sections = []
-        
+
+        # sections meeting at exactly the same times are interchangeable, so only the first of them is searched
+        # and the others are listed as its alternates
+        patterns = {}
         for section in sections_list:
-            self.sections.append(Section(section, self.credits, self.course_code, self.course_name))
+            if catalog is not None:
+                section = catalog.section(section, self.credits, self.course_name)
+            else:
+                section = Section(section, self.credits, self.course_code, self.course_name)
+            pattern = tuple(sorted((f.date, f.start, f.end) for f in section.blocks))
+            if pattern in patterns:
+                patterns[pattern].alternates.append(section.section)
+            else:
+                patterns[pattern] = section
+                self.sections.append(section)
 
     def __str__(self):
         return self.course_code + ' ' + self.course_name
 
 class Course:
-    def __init__(self, dicts_list):
+    def __init__(self, dicts_list, catalog=None):
         self.required = False
         self.coreqs = []
         self.total_credits = 0
@@ -120,16 +203,500 @@ class Course:
             else:
                 temp[-1].append(dict)
         for list in temp:
-            self.coreqs.append(Coreq(list))
+            self.coreqs.append(Coreq(list, catalog))
             self.total_credits += float(list[0]['Credits'])
 
     def __str__(self):
         return self.coreqs[0].course_code + ' ' + self.coreqs[0].course_name
 
-class ScheduleGenerator:
+class Catalog:
+    '''Every section in the course catalog, parsed and indexed once so that many students' selections can share it.
+    The catalog is read with read_csv() from a file laid out like the input CSV, its Corequisites? and Required? columns are ignored.'''
     def __init__(self, input_dicts):
+        self.rows = {}  # course code -> rows of the catalog for that course, in order
+        self.sections = []  # one Section for each row
+        self.ids = {}   # (course code, section) -> position in self.sections
+        for dict in input_dicts:
+            self.rows.setdefault(dict['Course code'], []).append(dict)
+            self.ids[(dict['Course code'], dict['Section'])] = len(self.sections)
+            self.sections.append(Section(dict, float(dict['Credits']), dict['Course code'], dict['Course name']))
+
+        # the pairs of sections of different courses that collide, kept like a sparse matrix, see conflicting()
+        # sweeping the blocks of each day in order of start time, a block collides with every later one that starts no later than it ends
+        course_codes = np.unique([f.course_code for f in self.sections], return_inverse=True)[1]
+        rows = [np.zeros(0, dtype=int)]
+        cols = [np.zeros(0, dtype=int)]
+        for date in range(1, 8):
+            blocks = sorted((block.start, block.end, n) for n, section in enumerate(self.sections) for block in section.blocks if block.date == date)
+            if blocks == []:
+                continue
+            starts = np.array([f[0] for f in blocks])
+            ends = np.array([f[1] for f in blocks])
+            owner = np.array([f[2] for f in blocks])
+            counts = np.searchsorted(starts, ends, side='right') - np.arange(len(blocks)) - 1
+            first = np.repeat(np.arange(len(blocks)), counts)
+            second = first + 1 + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            rows += [owner[first], owner[second]]
+            cols += [owner[second], owner[first]]
+        rows = np.concatenate(rows)
+        cols = np.concatenate(cols)
+        keep = course_codes[rows] != course_codes[cols]
+        pairs = np.unique(np.stack([rows[keep], cols[keep]], axis=1), axis=0)
+        self.conflict_ids = pairs[:, 1]
+        self.conflict_starts = np.searchsorted(pairs[:, 0], np.arange(len(self.sections) + 1))
+
+    def conflicting(self, id):
+        '''Returns an array of the positions in self.sections of the sections of other courses that collide with section id.'''
+        return self.conflict_ids[self.conflict_starts[id]:self.conflict_starts[id + 1]]
+
+    def section(self, section_dict, credits, course_name):
+        '''Returns a copy of the catalog's Section for a row, sharing its parsed blocks, for a Coreq to own.'''
+        section = copy.copy(self.sections[self.ids[(section_dict['Course code'], section_dict['Section'])]])
+        section.credits = credits
+        section.course_name = course_name
+        section.alternates = []
+        return section
+
+    def expand(self, selection_dicts):
+        '''Given a student's selection, return the rows to give ScheduleGenerator, as if they came from a full input CSV.
+        The selection has the input CSV's Corequisites?, Required?, and Course code columns, and one row per course,
+        with every section of that course from the catalog. If it also has a Section column, a row with a section in it
+        picks only that section of the course, and consecutive rows can pick several.'''
+        output_lines = []
+        for dict in selection_dicts:
+            assert dict['Course code'] in self.rows, 'The course ' + dict['Course code'] + ' is not in the catalog!'
+            rows = self.rows[dict['Course code']]
+            if dict.get('Section', '') != '':
+                rows = [f for f in rows if f['Section'] == dict['Section']]
+                assert rows != [], 'The section ' + dict['Course code'] + ' ' + dict['Section'] + ' is not in the catalog!'
+            for n, row in enumerate(rows):
+                line_dict = dict.copy()
+                line_dict.update(row)
+                # only the first row of a selection keeps its markers, like the first section of a course in the input CSV
+                line_dict['Corequisites?'] = dict['Corequisites?'] if n == 0 else ''
+                line_dict['Required?'] = dict['Required?'] if n == 0 else ''
+                output_lines.append(line_dict)
+        return output_lines
+
+def credit_combinations(credits, low, high, counters=None):
+    '''Given a list of credits, generate the index tuples of every combination whose credits add up to between low and high,
+    in the same order as itertools.combinations() taken with 0, 1, 2... elements.
+    Branches that can't reach low, or can't stay under high, are never visited.
+    If counters is given, like Stats.counters, the number of subsets visited is added to its 'subsets considered'.'''
+    # least[i][r] and most[i][r] are the fewest and most credits r elements from index i onward can add
+    least = []
+    most = []
+    for i in range(len(credits) + 1):
+        suffix = sorted(credits[i:])
+        least.append([sum(suffix[:r]) for r in range(len(suffix) + 1)])
+        most.append([sum(suffix[len(suffix) - r:]) for r in range(len(suffix) + 1)])
+    # the sums here are only used to prune, so leave some room for rounding in the credits
+    low -= 1e-9
+    high += 1e-9
+
+    def choose(start, r, total, chosen):
+        if counters is not None:
+            counters['subsets considered'] += 1
+        if r == 0:
+            yield tuple(chosen)
+            return
+        for i in range(start, len(credits) - r + 1):
+            if total + credits[i] + least[i + 1][r - 1] > high:
+                continue
+            if total + credits[i] + most[i + 1][r - 1] < low:
+                continue
+            chosen.append(i)
+            yield from choose(i + 1, r - 1, total + credits[i], chosen)
+            chosen.pop()
+
+    for n in range(0, len(credits) + 1):    # n elements -> n+1 possible sizes of subsets, 0 to n
+        if least[0][n] > high:
+            break   # credits can't be negative, so every larger subset has too many as well
+        if most[0][n] < low:
+            continue
+        yield from choose(0, n, 0, [])
+
+# the queries on ScheduleGenerator treat each combination of courses as a constraint problem: one variable per coreq,
+# whose domain is an int with a bit set for each of its sections still possible, see ScheduleGenerator.constraints()
+# compatible[i] has a bit set for every section that can be in the same schedule as section i
+
+def set_bits(mask):
+    '''Generate the positions of the bits set in an int, lowest first.'''
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def arc_consistency(domains, compatible):
+    '''Remove every section that has no compatible section left in some other domain, until nothing changes (AC-3).
+    Returns the new list of domains, or None if one of them runs out of sections, in which case there's no schedule.'''
+    domains = list(domains)
+    changed = True
+    while changed:
+        changed = False
+        for p in range(len(domains)):
+            supported = 0
+            for x in set_bits(domains[p]):
+                if all(domains[q] & compatible[x] for q in range(len(domains)) if q != p):
+                    supported |= 1 << x
+            if supported == 0:
+                return None
+            if supported != domains[p]:
+                domains[p] = supported
+                changed = True
+    return domains
+
+def constraint_components(domains, compatible):
+    '''Split the positions of the domains into groups that don't constrain each other,
+    where every section of one group is compatible with every section of the others. Returns a list of lists of positions.'''
+    # two domains are linked if some section of one rules out some section of the other
+    links = [[q for q in range(len(domains)) if q != p and any(domains[q] & ~compatible[x] for x in set_bits(domains[p]))]
+             for p in range(len(domains))]
+    components = []
+    seen = set()
+    for p in range(len(domains)):
+        if p in seen:
+            continue
+        component = [p]
+        seen.add(p)
+        for q in component:
+            for r in links[q]:
+                if r not in seen:
+                    seen.add(r)
+                    component.append(r)
+        components.append(sorted(component))
+    return components
+
+def count_solutions(domains, compatible, weights, memo):
+    '''Count the ways to pick one section from each domain with every pair compatible, each picked section counting weights[x] times.
+    Results are kept in memo by the domains left, which can be shared by every count with the same compatible and weights.'''
+    if len(domains) == 1:
+        return sum([weights[x] for x in set_bits(domains[0])])
+    key = tuple(sorted(domains))
+    if key in memo:
+        return memo[key]
+    # branch on the smallest domain, checking the others forward so the last one is counted without trying its sections
+    first = min(range(len(domains)), key=lambda p: bin(domains[p]).count('1'))
+    rest = domains[:first] + domains[first + 1:]
+    total = 0
+    for x in set_bits(domains[first]):
+        remaining = [f & compatible[x] for f in rest]
+        if 0 not in remaining:
+            total += weights[x] * count_solutions(remaining, compatible, weights, memo)
+    memo[key] = total
+    return total
+
+def find_solution(domains, compatible):
+    '''Returns a list with one section from each domain, with every pair compatible, or None if there isn't one.'''
+    if domains == []:
+        return []
+    first = min(range(len(domains)), key=lambda p: bin(domains[p]).count('1'))
+    rest = domains[:first] + domains[first + 1:]
+    for x in set_bits(domains[first]):
+        remaining = [f & compatible[x] for f in rest]
+        if 0 in remaining:
+            continue
+        solution = find_solution(remaining, compatible)
+        if solution is not None:
+            return solution[:first] + [x] + solution[first:]
+    return None
+
+def supported_sections(domains, compatible):
+    '''Returns a list with the sections of each domain that are in at least one solution, all 0 if there are none.'''
+    witnessed = [0] * len(domains)
+    for p in range(len(domains)):
+        for x in set_bits(domains[p] & ~witnessed[p]):
+            fixed = [f & compatible[x] for f in domains]
+            fixed[p] = 1 << x
+            if 0 in fixed:
+                continue
+            solution = find_solution(fixed, compatible)
+            if solution is not None:
+                # every section in the solution found is supported too, so none of them need a search of their own
+                for q, y in enumerate(solution):
+                    witnessed[q] |= 1 << y
+    return witnessed
+
+class Ranking:
+    '''Keeps the k best schedules offered to it, in O(k) memory.
+    Schedules are ranked by key, highest first (lowest first if reverse), and ties go to the lowest seq.'''
+    def __init__(self, k, reverse=False):
+        self.k = k
+        self.reverse = reverse
+        self.heap = []  # entries of (order, payload), worst at heap[0]
+
+    def offer(self, key, seq, make_payload):
+        '''Consider a schedule for the ranking. make_payload is only called if the schedule makes the cut.'''
+        # order is larger for better schedules, so the worst one kept is at the top of the min-heap
+        if self.k == 0:
+            return
+        if self.reverse:
+            key = -key
+        if len(self.heap) == self.k and key < self.heap[0][0][0]:
+            return
+        if self.reverse:
+            order = (key, seq)
+        else:
+            order = (key, (-seq[0], tuple(-f for f in seq[1])))
+        if len(self.heap) == self.k and order < self.heap[0][0]:
+            return
+        self.add(order, make_payload())
+
+    def add(self, order, payload):
+        if self.k == 0:
+            return
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, (order, payload))
+        elif order > self.heap[0][0]:
+            heapq.heapreplace(self.heap, (order, payload))
+
+    def merge(self, other):
+        '''Add everything kept by another ranking of the same kind, e.g. one filled in by another process.'''
+        for entry in other.heap:
+            self.add(*entry)
+
+    def cutoff(self):
+        '''Returns the key a schedule needs to reach to still make the cut, or None if the ranking isn't full yet.'''
+        if len(self.heap) < self.k or self.k == 0:
+            return None
+        if self.reverse:
+            return -self.heap[0][0][0]
+        return self.heap[0][0][0]
+
+    def results(self):
+        '''Returns the payloads from best to worst.'''
+        return [f[1] for f in sorted(self.heap, key=lambda x: x[0], reverse=True)]
+
+class Stats:
+    '''Opt-in instrumentation for ScheduleGenerator.generate_schedules(), which fills it in and returns it.
+    counters counts what was done at each step, while seconds and peak_memory hold the wall time and the peak bytes of memory of each stage.
+    While searching, progress is called with the Stats every interval seconds, or pass progress=True to keep a progress line updated on stderr,
+    and anything false for no progress reports.
+    Peak memory is only measured with memory=True, since tracemalloc slows everything down noticeably.
+    With more than one worker, the seconds of the search, score, filter, and rank stages are added up across the workers.'''
+    def __init__(self, progress=None, interval=1, memory=False):
+        if progress is True:
+            progress = Stats.print_progress
+        elif not progress:
+            progress = None
+        self.progress = progress
+        self.interval = interval
+        self.memory = memory
+        self.counters = {name: 0 for name in ['subsets considered', 'subsets feasible', 'combinations searched', 'candidates', 'conflicts pruned',
+                                              'bound pruned', 'schedules scored', 'schedules kept', 'images written']}
+        self.seconds = {}
+        self.peak_memory = {}
+        # how many schedules there would be without any conflicts, added up over the combinations, to tell how far along the search is
+        self.work_total = 0
+        self.work_done = 0
+        self.started = None
+        self.search_started = None
+        self.last_report = 0
+        self.stage = None
+        self.tracing = False
+
+    def __getstate__(self):
+        # the progress callback stays behind, a worker's Stats only collects numbers to merge()
+        state = dict(self.__dict__)
+        state['progress'] = None
+        return state
+
+    def start(self):
+        self.started = time.perf_counter()
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.tracing = True
+
+    def finish(self):
+        self.seconds['total'] = time.perf_counter() - self.started
+        if self.tracing:
+            tracemalloc.stop()
+            self.tracing = False
+        if self.progress is not None:
+            self.progress(self)
+            if self.progress == Stats.print_progress:
+                sys.stderr.write('\n')
+
+    def begin(self, stage):
+        '''Start timing a stage. Stages can be timed in many pieces, but not inside each other.'''
+        self.stage = (stage, time.perf_counter())
+        if self.memory:
+            tracemalloc.reset_peak()
+
+    def end(self):
+        stage, start = self.stage
+        self.seconds[stage] = self.seconds.get(stage, 0) + time.perf_counter() - start
+        if self.memory:
+            self.peak_memory[stage] = max(self.peak_memory.get(stage, 0), tracemalloc.get_traced_memory()[1])
+        self.stage = None
+
+    def plan(self, combinations):
+        '''Count the work ahead in a list of (number, credits, coreqs) combinations.'''
+        self.work_total += sum([math.prod([len(f) for f in coreqs]) for number, credits, coreqs in combinations])
+        if self.search_started is None:
+            self.search_started = time.perf_counter()
+
+    def advance(self, coreqs):
+        '''Count a combination as searched.'''
+        self.work_done += math.prod([len(f) for f in coreqs])
+        self.counters['combinations searched'] += 1
+        self.tick()
+
+    def tick(self):
+        if self.progress is not None and time.perf_counter() - self.last_report >= self.interval:
+            self.last_report = time.perf_counter()
+            self.progress(self)
+
+    def merge(self, other):
+        '''Add in the counts and times of a worker's Stats.'''
+        for name in other.counters:
+            self.counters[name] += other.counters[name]
+        for stage in other.seconds:
+            self.seconds[stage] = self.seconds.get(stage, 0) + other.seconds[stage]
+        for stage in other.peak_memory:
+            self.peak_memory[stage] = max(self.peak_memory.get(stage, 0), other.peak_memory[stage])
+        self.work_done += other.work_done
+        self.tick()
+
+    def fraction(self):
+        '''How much of the search is done, from 0 to 1.'''
+        return self.work_done / self.work_total if self.work_total > 0 else 1
+
+    def eta(self):
+        '''The estimated seconds of searching left, or None before there's anything to go on.'''
+        if self.search_started is None or self.work_done == 0:
+            return None
+        return (time.perf_counter() - self.search_started) * (1 - self.fraction()) / self.fraction()
+
+    def print_progress(self):
+        line = 'Searched ' + str(self.counters['combinations searched']) + ' of ' + str(self.counters['subsets feasible']) + ' combinations'
+        line += ' (' + str(round(100 * self.fraction(), 1)) + '%), ' + str(self.counters['schedules scored']) + ' schedules'
+        if self.started is not None:
+            line += ', ' + str(timedelta(seconds=round(time.perf_counter() - self.started))) + ' elapsed'
+        if self.eta() is not None:
+            line += ', about ' + str(timedelta(seconds=round(self.eta()))) + ' left'
+        sys.stderr.write('\r' + line + '   ')
+        sys.stderr.flush()
+
+    def summary(self):
+        '''Everything measured, as a dict that can be saved as JSON.'''
+        return {'counters': dict(self.counters), 'seconds': dict(self.seconds), 'peak_memory': dict(self.peak_memory)}
+
+# filters decide which schedules to keep, given a table of columns like the one from ScheduleGenerator.schedule_table(),
+# the positions of the rows left to check, and an array with True for each section in a blocked time, see Pipeline.blocked_sections()
+# each returns True for the rows to keep, and comes with a rough cost per row, see Pipeline.order()
+def no_saturday_class(table, rows, blocked):
+    return ~table['saturday_class'][rows]
+
+def no_sleepless_nights(table, rows, blocked):
+    return table['sleepless'][rows] == 0
+
+def no_early_morns(table, rows, blocked):
+    return table['early_morns'][rows] == 0
+
+def no_late_nights(table, rows, blocked):
+    return table['late_nights'][rows] == 0
+
+def no_blocked_times(table, rows, blocked):
+    # the padding in table['sections'] is -1, which is the extra False at the end of blocked
+    return ~blocked[table['sections'][rows]].any(axis=1)
+
+FILTERS = {
+    'saturday': (no_saturday_class, 1),
+    'sleepless': (no_sleepless_nights, 1),
+    'mornings': (no_early_morns, 1),
+    'nights': (no_late_nights, 1),
+    'blocked': (no_blocked_times, 4),
+}
+
+# scoring terms, given the same table and rows, return an array of how good each row is, higher is better
+# a Pipeline ranks schedules by a weighted sum of these
+TERMS = {
+    # how clustered the classes are, pretty good results, though classes can end up being late at night
+    'fullness': lambda table, rows: table['class_time'][rows] / table['total_time'][rows],
+    # will simply prefer fewer credits
+    'short_week': lambda table, rows: -table['total_time'][rows],
+    # we should just make the credits range narrower
+    'fewer_credits': lambda table, rows: -table['credits'][rows],
+    # pulls classes toward 1PM at the expense of more breaks between classes, days with a single class, and lower overall fullness
+    'midday': lambda table, rows: table['weight'][rows] * table['class_time'][rows] / table['total_time'][rows],
+    # try to scale fullness with credits, since more credits tends to lower fullness
+    'fullness_per_credit': lambda table, rows: table['class_time'][rows] / table['total_time'][rows] / table['credits'][rows],
+    # fullness with the extra travel time of getting home late at night, see night_travel()
+    'night_fullness': lambda table, rows: table['class_time'][rows] / (table['total_time'][rows] + table['night_travel_time'][rows]),
+}
+
+class Pipeline:
+    '''Which schedules to keep and how to rank them, worked out on whole columns of schedules at once.
+    filters is a list of names from FILTERS, and terms is a dict of names from TERMS to their weights, which defaults to fullness alone.
+    blocked is a list of times to keep free for other commitments, written like 'Days and times', and adds the 'blocked' filter.'''
+    def __init__(self, filters=('saturday', 'sleepless'), terms=None, blocked=()):
+        self.filters = list(filters)
+        if len(blocked) > 0 and 'blocked' not in self.filters:
+            self.filters.append('blocked')
+        self.terms = {'fullness': 1} if terms is None else dict(terms)
+        for name in self.filters:
+            assert name in FILTERS, 'There is no filter named ' + name + '!'
+        for name in self.terms:
+            assert name in TERMS, 'There is no scoring term named ' + name + '!'
+
+        # one bit for every minute of the week to keep free, like Section.mask
+        self.blocked_mask = 0
+        for string in blocked:
+            for date, start, end in parse_days_and_times(string):
+                self.blocked_mask |= minute_mask(date, start, end)
+
+        self.checked = {name: 0 for name in self.filters}   # rows each filter has checked, and kept, to estimate its selectivity
+        self.kept = {name: 0 for name in self.filters}
+
+    def search_options(self):
+        '''The options to give ScheduleGenerator.search() so it leaves out what the filters would, without searching it.'''
+        return {'no_saturdays': 'saturday' in self.filters, 'no_sleepless': 'sleepless' in self.filters,
+                'no_mornings': 'mornings' in self.filters, 'no_nights': 'nights' in self.filters}
+
+    def blocked_sections(self, generator):
+        '''Returns an array with True for each of the generator's sections that meets during a blocked time,
+        and one more False at the end for the padding in a table's sections.'''
+        if 'blocked' not in self.filters:
+            return np.zeros(len(generator.section_masks) + 1, dtype=bool)
+        return np.array([mask & self.blocked_mask != 0 for mask in generator.section_masks] + [False])
+
+    def bounded(self):
+        '''Whether the schedules are ranked by fullness alone, which is what the bound in ScheduleGenerator.search() assumes.'''
+        return self.terms == {'fullness': 1}
+
+    def order(self):
+        '''The filters, cheapest and most selective first, by the cost of each per row it removes.
+        Selectivity starts out as a guess of half, and is estimated from the rows each filter has checked so far.'''
+        removed = lambda name: 1 - (self.kept[name] + 1) / (self.checked[name] + 2)
+        return sorted(self.filters, key=lambda name: FILTERS[name][1] / max(removed(name), 1e-6))
+
+    def keep(self, table, blocked):
+        '''Run the filters over a table, each only on the rows the ones before it kept. Returns the positions of the rows kept.'''
+        rows = np.arange(len(table['sections']))
+        for name in self.order():
+            if len(rows) == 0:
+                break
+            test = FILTERS[name][0]
+            self.checked[name] += len(rows)
+            rows = rows[test(table, rows, blocked)]
+            self.kept[name] += len(rows)
+        return rows
+
+    def key(self, table, rows):
+        '''Returns the ranking key, the weighted sum of the scoring terms, of each of the given rows of a table.'''
+        keys = np.zeros(len(rows))
+        for name, weight in self.terms.items():
+            keys = keys + weight * TERMS[name](table, rows)
+        return keys
+
+class ScheduleGenerator:
+    def __init__(self, input_dicts, catalog=None):
         self.required = []  # list of lists of course codes and credits, grouped as corequisites
         self.flexible = []  # same as above
+        self.catalog = catalog  # if given, sections and their conflicts are taken from the Catalog instead of worked out again
+        self.input_dicts = input_dicts  # kept to snapshot for the next run, see generate_schedules()
+        self.input_hash = hashlib.sha256(json.dumps(input_dicts, sort_keys=True).encode('utf-8')).hexdigest()
 
         temp = []
         for dict in input_dicts:
@@ -139,100 +706,859 @@ class ScheduleGenerator:
                 temp[-1].append(dict)
         for list in temp:
             if list[0]['Required?'] == 'r':
-                self.required.append(Course(list))
+                self.required.append(Course(list, catalog))
             else:
-                self.flexible.append(Course(list))
-
-    def generate_schedules(self):
-        self.schedules = []
-
-        for n in range(0, len(self.flexible) + 1):  # n elements -> n+1 possible sizes of subsets, 0 to n
-            for element in list(itertools.combinations(self.flexible, n)):
-                combination = list(element) + self.required # a list of Course objects
-                combination = [f.coreqs for f in combination]   # a list of lists of Coreq objects
-                combination = list(itertools.chain.from_iterable(combination))  # a list of Coreq objects
-                credits = sum([f.credits for f in combination])
-
-                # only consider combinations that fulfill the required number of credits
-                if credits >= MIN_CREDITS and credits <= MAX_CREDITS:
-                    combination = [f.sections for f in combination] # a list of lists of Section objects
-
-                    # schedule is any possible combination of sections
-                    for possible_schedule in list(itertools.product(*combination)):
-                        self.schedules.append(Schedule(possible_schedule))
-                        self.schedules[-1].credits = credits
-
-        # eliminate any combinations of courses that contain a conflict
-        self.schedules = [f for f in self.schedules if f.contains_conflict() == False]
+                self.flexible.append(Course(list, catalog))
 
-        # calculate the properties of each schedule
-        for schedule in self.schedules:
-            schedule.calculate()
-
-        # eliminate any schedule that contains a Saturday class
-        self.schedules = [f for f in self.schedules if f.saturday_class == False]
-        # wouldn't it just be faster to ignore any "Date and time" strings containing an "Sa"?
-
-        # we can filter out schedules with classes before 9 AM or classes after 6 PM here
-        no_mornings = [f for f in self.schedules if f.early_morns == 0]
-        # print(len(no_mornings))
-        no_nights = [f for f in self.schedules if f.late_nights == 0]
-        # print(len(no_nights))
-
-        # filter out schedules with a night class immediately followed by an early morning class
-        self.schedules = [f for f in self.schedules if f.sleepless == 0]
-        # print(len(self.schedules))
-
-        # rank the remaining schedules by how clustered the classes are
-        self.schedules.sort(key=lambda x: x.class_time / x.total_time, reverse=True)  # pretty good results, though classes can end up being late at night
-
-        # the following are alternative ways of ranking the remaining schedules, each with a slightly different result
-        # self.schedules.sort(key=lambda x: x.total_time, reverse=False)    # will simply prefer fewer credits
-        # self.schedules.sort(key=lambda x: x.credits, reverse=False)   # we should just make the credits range narrower
-        # self.schedules.sort(key=lambda x: x.weight * x.class_time / x.total_time, reverse=True) # pulls classes toward 1PM at the expense of more breaks between classes, days with a single class, and lower overall fullness
-        # try adding 1.5 hours as travel time after 8 PM? 2 hours after 10? travel time as a function of time of day? may also need to account for direction of travel: 80 minutes vs. 40 minutes, days that end early or start late.
-        # self.schedules.sort(key=lambda x: x.class_time / x.total_time / credits, reverse=True)    # try to scale fullness with credits, since more credits tends to lower fullness
+        self.index_sections()
+        self.nodes_expanded = 0
+        self.nodes_pruned = 0
+        self.conflicts_pruned = 0
 
+    def index_sections(self):
+        '''Number every section and precompute which pairs of sections conflict with each other.
+        conflicts[i, j] is True when sections i and j belong to different courses and occur at the same time,
+        and conflict_rows[i] holds the same row packed into an int, with bit j set for every conflict.'''
+        self.sections = []
+        for course in self.required + self.flexible:
+            for coreq in course.coreqs:
+                for section in coreq.sections:
+                    section.index = len(self.sections)
+                    self.sections.append(section)
+
+        self.conflicts = np.zeros((len(self.sections), len(self.sections)), dtype=bool)
+        if self.catalog is not None:
+            # look the conflicts up in the catalog, translating its positions into ours
+            ids = np.array([self.catalog.ids[(f.course_code, f.section)] for f in self.sections], dtype=int)
+            local = np.full(len(self.catalog.sections), -1)
+            local[ids] = np.arange(len(self.sections))
+            for n, id in enumerate(ids):
+                others = local[self.catalog.conflicting(id)]
+                self.conflicts[n, others[others >= 0]] = True
+        else:
+            # compare the blocks one day at a time, two blocks collide if each starts no later than the other ends
+            for date in range(1, 8):
+                blocks = [(section.index, block) for section in self.sections for block in section.blocks if block.date == date]
+                if blocks == []:
+                    continue
+                owner = np.array([f[0] for f in blocks])
+                start = np.array([f[1].start for f in blocks])
+                end = np.array([f[1].end for f in blocks])
+                rows, cols = np.nonzero((start[:, None] <= end[None, :]) & (start[None, :] <= end[:, None]))
+                self.conflicts[owner[rows], owner[cols]] = True
+            course_codes = np.array([f.course_code for f in self.sections])
+            self.conflicts &= course_codes[:, None] != course_codes[None, :]
+
+        self.conflict_rows = [int.from_bytes(np.packbits(row, bitorder='little').tobytes(), 'little') for row in self.conflicts]
+
+        # per-section columns used by score(), days are columns with Monday (date 1) at index 0
+        # a day without a block starts after midnight and ends before it, so it never wins a min() or max()
+        self.section_class_time = np.zeros(len(self.sections))
+        self.section_weight = np.zeros(len(self.sections))
+        self.section_starts = np.full((len(self.sections), 7), 24 * 60)
+        self.section_ends = np.full((len(self.sections), 7), -1)
+        self.section_early_morns = np.zeros((len(self.sections), 7), dtype=bool)
+        self.section_late_nights = np.zeros((len(self.sections), 7), dtype=bool)
+        for section in self.sections:
+            for block in section.blocks:
+                start = block.start
+                end = block.end
+                self.section_class_time[section.index] += block.duration
+                self.section_weight[section.index] += ((gaussian((start - 8 * 60) % (24 * 60)) + gaussian((end - 8 * 60) % (24 * 60))) / 2) * block.duration / 60
+                self.section_starts[section.index, block.date - 1] = min(self.section_starts[section.index, block.date - 1], start)
+                self.section_ends[section.index, block.date - 1] = max(self.section_ends[section.index, block.date - 1], end)
+            for date in section.early_morns:
+                self.section_early_morns[section.index, date - 1] = True
+            for date in section.late_nights:
+                self.section_late_nights[section.index, date - 1] = True
+
+        # the same rules as plain lists for search(), with days as bits: Monday (date 1) is bit 0
+        self.section_saturday = [f.saturday for f in self.sections]
+        self.section_masks = [f.mask for f in self.sections]
+        self.section_early_days = [sum([1 << (date - 1) for date in f.early_morns]) for f in self.sections]
+        self.section_late_days = [sum([1 << (date - 1) for date in f.late_nights]) for f in self.sections]
+
+    def __getstate__(self):
+        # only the per-section tables are needed to search and score, see search_worker()
+        # the Course, Coreq, and Section objects stay behind in the main process
+        state = dict(self.__dict__)
+        for name in ['required', 'flexible', 'sections', 'conflicts', 'preferred', 'undesirable', 'catalog', 'input_dicts']:
+            state.pop(name, None)
+        return state
+
+    def score(self, schedules):
+        '''Given a 2D array of section indices with one schedule per row,
+        return a dict of arrays holding the same properties Schedule.calculate() would, one entry per row.
+        Assumes the schedules are conflict-free, so a day's classes and breaks add up to the time between its first start and last end.'''
+        starts = self.section_starts[schedules].min(axis=1)
+        ends = self.section_ends[schedules].max(axis=1)
+        days = ends >= 0
+        early_morns = self.section_early_morns[schedules].any(axis=1)
+        late_nights = self.section_late_nights[schedules].any(axis=1)
+
+        metrics = {}
+        metrics['class_time'] = self.section_class_time[schedules].sum(axis=1)
+        metrics['travel_time'] = 2 * 60 * days.sum(axis=1)
+        metrics['total_time'] = (metrics['travel_time'] + np.where(days, ends - starts, 0).sum(axis=1)).astype(float)
+        metrics['early_morns'] = early_morns.sum(axis=1)
+        metrics['late_nights'] = late_nights.sum(axis=1)
+        metrics['sleepless'] = (late_nights[:, :-1] & early_morns[:, 1:]).sum(axis=1)
+        metrics['saturday_class'] = days[:, 6 - 1]
+        metrics['weight'] = self.section_weight[schedules].sum(axis=1)
+        metrics['night_travel_time'] = np.where(days, night_travel(ends), 0).sum(axis=1)
+        return metrics
+
+    def search(self, coreqs, no_mornings=False, no_nights=False, cutoff=None, no_saturdays=True, no_sleepless=True, blocked=None):
+        '''Depth-first search over the sections of the given coreqs, placing one coreq's section at a time.
+        coreqs is a list with a list of section indices for each coreq.
+        A branch is abandoned as soon as the newest section collides with a section already placed,
+        or breaks the Saturday, sleepless, early morning, or late night rules, whichever are turned on.
+        blocked can be a list with True for each section to leave out, see Pipeline.blocked_sections().
+        If cutoff is given, it's called to get the lowest class_time / total_time still worth finding (or None),
+        and a branch is also abandoned when no schedule in it can reach that.
+        Yields a tuple of indices into self.sections for each conflict-free schedule, in the same order as coreqs.'''
+        # place the coreqs with the fewest sections first, so dead ends are found close to the root
+        order = sorted(range(len(coreqs)), key=lambda x: len(coreqs[x]))
+        candidates = []
+        for m in order:
+            candidates.append([f for f in coreqs[m]
+                               if not (no_saturdays and self.section_saturday[f])
+                               and not (no_mornings and self.section_early_days[f])
+                               and not (no_nights and self.section_late_days[f])
+                               and not (blocked is not None and blocked[f])])
+        chosen = [0] * len(coreqs)
+
+        if cutoff is not None:
+            class_times = self.section_class_time.tolist()
+            section_starts = self.section_starts.tolist()
+            section_ends = self.section_ends.tolist()
+            # the most class time the coreqs from each depth onward could add
+            remaining = [0] * (len(order) + 1)
+            for depth in range(len(order) - 1, -1, -1):
+                remaining[depth] = remaining[depth + 1] + max([class_times[f] for f in candidates[depth]], default=0)
+
+        def bound(depth, week):
+            '''The best class_time / total_time any schedule below this branch could have.'''
+            class_time, starts, ends = week
+            days = [d for d in range(7) if ends[d] >= 0]
+            if days == []:
+                return 1
+            # at best the remaining coreqs fill the breaks without adding days or widening any of them,
+            # and travel time alone is two hours for each day already used
+            total_time = sum([2 * 60 + ends[d] - starts[d] for d in days])
+            best = class_time + remaining[depth]
+            return min(best / total_time, best / (best + 2 * 60 * len(days)))
+
+        def place(depth, blocked, early_days, late_days, week):
+            # blocked has a bit set for every section that conflicts with one already placed
+            if depth == len(order):
+                yield tuple(chosen)
+                return
+            if week is not None:
+                lowest = cutoff()
+                if lowest is not None and bound(depth, week) < lowest:
+                    self.nodes_pruned += 1
+                    return
+            for section in candidates[depth]:
+                if blocked >> section & 1:
+                    self.conflicts_pruned += 1
+                    continue
+                new_early_days = early_days | self.section_early_days[section]
+                new_late_days = late_days | self.section_late_days[section]
+                # a night class followed immediately by an early morning class the next day
+                if no_sleepless and new_late_days << 1 & new_early_days:
+                    continue
+                chosen[order[depth]] = section
+                self.nodes_expanded += 1
+                new_week = None
+                if week is not None:
+                    new_week = (week[0] + class_times[section],
+                                tuple(map(min, week[1], section_starts[section])),
+                                tuple(map(max, week[2], section_ends[section])))
+                yield from place(depth + 1, blocked | self.conflict_rows[section], new_early_days, new_late_days, new_week)
+
+        week = None
+        if cutoff is not None:
+            week = (0, (24 * 60,) * 7, (-1,) * 7)
+        yield from place(0, 0, 0, 0, week)
+
+    def combinations(self, min_credits=None, max_credits=None, stats=None):
+        '''Generate every combination of courses that fulfills the credit requirement,
+        which defaults to MIN_CREDITS and MAX_CREDITS.
+        Yields (number, credits, coreqs) where number counts the combinations in the order they're tried,
+        and coreqs is a list with a list of section indices for each coreq, as search() takes.
+        With stats, the subsets considered and the feasible ones are counted.'''
+        if min_credits is None:
+            min_credits = MIN_CREDITS
+        if max_credits is None:
+            max_credits = MAX_CREDITS
+        required_credits = sum([f.total_credits for f in self.required])
+
+        number = 0
+        counters = stats.counters if stats is not None else None
+        for element in credit_combinations([f.total_credits for f in self.flexible], min_credits - required_credits, max_credits - required_credits, counters):
+            combination = [self.flexible[f] for f in element] + self.required # a list of Course objects
+            combination = [f.coreqs for f in combination]   # a list of lists of Coreq objects
+            combination = list(itertools.chain.from_iterable(combination))  # a list of Coreq objects
+            credits = sum([f.credits for f in combination])
+
+            # only consider combinations that fulfill the required number of credits
+            if credits >= min_credits and credits <= max_credits:
+                if stats is not None:
+                    stats.counters['subsets feasible'] += 1
+                yield number, credits, [[f.index for f in coreq.sections] for coreq in combination]
+                number += 1
+
+    def scored_schedules(self, combinations, no_mornings=False, no_nights=False, cutoff=None, chunk_size=4096, no_saturdays=True, no_sleepless=True,
+                         blocked=None, stats=None, parts=False):
+        '''Search each of the given (number, credits, coreqs) combinations for conflict-free schedules,
+        scoring them chunk_size at a time so only one chunk is ever held in memory. The rest of the options are passed on to search(),
+        except stats, which times the search and score stages and reports progress,
+        and parts, which means the combinations are only parts of ones the caller counts as searched itself.
+        Yields (number, credits, schedules, metrics) where schedules is a 2D array of section indices,
+        and metrics is the dict returned by score().'''
+        for number, credits, coreqs in combinations:
+            # schedule is any combination of sections without a conflict, a Saturday class, or a sleepless night
+            # we can also filter out schedules with classes before 9 AM or classes after 6 PM here
+            found = self.search(coreqs, no_mornings, no_nights, cutoff, no_saturdays, no_sleepless, blocked)
+            while True:
+                if stats is not None:
+                    stats.begin('search')
+                chunk = np.array(list(itertools.islice(found, chunk_size)), dtype=np.int32)
+                if stats is not None:
+                    stats.end()
+                if len(chunk) == 0:
+                    break
+                # calculate the properties of every schedule in the chunk at once
+                if stats is not None:
+                    stats.begin('score')
+                metrics = self.score(chunk)
+                if stats is not None:
+                    stats.end()
+                    stats.counters['schedules scored'] += len(chunk)
+                    stats.tick()
+                yield number, credits, chunk, metrics
+            if stats is not None and not parts:
+                stats.advance(coreqs)
+
+    def rank(self, combinations, k=10, pipeline=None, optimize=False, stats=None):
+        '''Search the given combinations and return Rankings of the top k and bottom k schedules kept by the Pipeline,
+        which defaults to Pipeline(). Each ranked payload is (row of section indices, credits, dict of the schedule's properties).
+        With optimize, only the top k are found, and branches of the search that can't beat the kth best so far are skipped.
+        With stats, each stage is timed and counted.'''
+        if pipeline is None:
+            pipeline = Pipeline()
+        if stats is not None:
+            combinations = list(combinations)
+            stats.plan(combinations)
+        preferred = Ranking(k)
+        undesirable = Ranking(k, reverse=True)
+
+        # the filters that only depend on each section alone, or on pairs of them, are applied during the search already
+        # the bound only holds for ranking by fullness alone, see Pipeline.bounded()
+        # small chunks keep the cutoff close behind the schedules found so far
+        blocked = pipeline.blocked_sections(self)
+        chunks = self.scored_schedules(combinations, cutoff=preferred.cutoff if optimize else None, chunk_size=64 if optimize else 4096,
+                                       blocked=blocked.tolist(), stats=stats, **pipeline.search_options())
+
+        for number, credits, chunk, metrics in chunks:
+            if stats is not None:
+                stats.begin('filter')
+            table = dict(metrics, sections=chunk, credits=np.full(len(chunk), float(credits)))
+            kept = pipeline.keep(table, blocked)
+            if stats is not None:
+                stats.end()
+                stats.counters['schedules kept'] += len(kept)
+                stats.begin('rank')
+            keys = pipeline.key(table, kept)
+
+            # ties are broken by the order the schedules would have been generated in:
+            # by course combination, then by section indices, which is the order of itertools.product()
+            for x, n in enumerate(kept.tolist()):
+                key = keys[x].item()
+                row = tuple(chunk[n].tolist())
+                make_payload = lambda: (row, credits, {name: metrics[name][n].item() for name in metrics})
+                preferred.offer(key, (number, row), make_payload)
+                if not optimize:
+                    undesirable.offer(key, (number, row), make_payload)
+            if stats is not None:
+                stats.end()
+
+        return preferred, undesirable
+
+    def parallel_rank(self, workers, combinations, k=10, pipeline=None, optimize=False, stats=None):
+        '''Same as rank(), but spread across a pool of worker processes.
+        Each worker ranks its own share of the combinations, and the rankings are merged here, along with the workers' Stats.'''
+        tasks = list(combinations)
+        if len(tasks) < 4 * workers:
+            # too few combinations to keep the workers busy, so split each one by the sections of its largest coreq
+            split = []
+            for number, credits, coreqs in tasks:
+                m = max(range(len(coreqs)), key=lambda x: len(coreqs[x]), default=None)
+                if m is None:
+                    split.append((number, credits, coreqs))
+                    continue
+                for section in coreqs[m]:
+                    split.append((number, credits, coreqs[:m] + [[section]] + coreqs[m + 1:]))
+            tasks = split
+
+        if stats is not None:
+            stats.plan(tasks)
+            # a combination split into several tasks only counts as searched once all of them are
+            unsearched = {}
+            for number, credits, coreqs in tasks:
+                unsearched[number] = unsearched.get(number, 0) + 1
+
+        preferred = Ranking(k)
+        undesirable = Ranking(k, reverse=True)
+        with ProcessPoolExecutor(max_workers=workers, initializer=start_worker, initargs=(self,)) as executor:
+            # each worker gets its own Stats to fill in, if any
+            jobs = [([task], k, pipeline, optimize, None if stats is None else Stats(memory=stats.memory)) for task in tasks]
+            for task, ranked in zip(tasks, executor.map(search_worker, jobs, chunksize=max(1, len(jobs) // (8 * workers)))):
+                preferred.merge(ranked[0])
+                undesirable.merge(ranked[1])
+                self.nodes_expanded += ranked[2]
+                self.nodes_pruned += ranked[3]
+                self.conflicts_pruned += ranked[4]
+                if stats is not None:
+                    unsearched[task[0]] -= 1
+                    ranked[5].counters['combinations searched'] = 1 if unsearched[task[0]] == 0 else 0
+                    stats.merge(ranked[5])
+        return preferred, undesirable
+
+    def schedule_table(self, min_credits=None, max_credits=None, previous=None, stats=None, workers=1):
+        '''Find every conflict-free schedule of every combination that fulfills the credit requirement,
+        without applying the Saturday, sleepless, early morning, or late night rules, so those can be applied afterward.
+        Returns a dict of arrays with one entry per schedule: 'sections' holds the section indices in coreq order,
+        padded with -1 to the width of the largest combination, 'number' and 'credits' come from combinations(),
+        and the rest are the properties from score(). The schedules are grouped by number.
+        previous can be a (ScheduleGenerator, table) pair from an earlier run of a different input with the same credit requirement.
+        Then a combination of the same coreqs as one of the earlier run's only searches for the schedules that use a section
+        added or changed since, and copies the rest over from the earlier table, which is the same as searching it all again.
+        With stats, the search is timed and counted as in rank(). With more than one worker, the searches are spread across
+        that many processes, see table_searches(), and the table is the same as with one.'''
+        # a section is unchanged if its course, section number, meeting times, and alternates are all the same
+        signature = lambda section: (section.course_code, section.section, section.days_and_times, tuple(section.alternates))
+        # a combination is matched up by the course codes of its coreqs, in order
+        coreq_codes = lambda generator, coreqs: tuple(generator.sections[f[0]].course_code for f in coreqs)
+
+        earlier = {}    # coreq codes -> number of the combination in the earlier run
+        if previous is not None:
+            generator, old_table = previous
+            new_indices = {signature(f): f.index for f in self.sections}
+            # where each of the earlier run's sections is now, with -1 for sections since removed or changed,
+            # and one more -1 on the end so the padding in old_table['sections'] stays -1 too
+            renumber = np.array([new_indices.get(signature(f), -1) for f in generator.sections] + [-1], dtype=np.int32)
+            unchanged = set(renumber[renumber >= 0].tolist())
+            for number, credits, coreqs in generator.combinations(min_credits, max_credits):
+                earlier[coreq_codes(generator, coreqs)] = number
+
+        combinations = self.combinations(min_credits, max_credits, stats)
+        if stats is not None:
+            stats.begin('combinations')
+            combinations = list(combinations)
+            stats.end()
+            stats.plan(combinations)
+
+        # the searches are all planned first, so they can be run in parallel
+        tasks = []  # (number, credits, coreqs to search, the whole combination's coreqs if this is its last search or else None)
+        planned = []    # (number, credits, schedules, metrics) copied over, or the position in tasks of a search to put there
+        for number, credits, coreqs in combinations:
+            old_number = earlier.get(coreq_codes(self, coreqs))
+            if old_number is None:
+                planned.append(len(tasks))
+                tasks.append((number, credits, coreqs, coreqs))
+                continue
+
+            # the earlier schedules made only of unchanged sections are still conflict-free, with the same properties
+            low, high = np.searchsorted(old_table['number'], [old_number, old_number + 1])
+            rows = renumber[old_table['sections'][low:high, :len(coreqs)]]
+            keep = (rows >= 0).all(axis=1)
+            planned.append((number, credits, rows[keep], {name: old_table[name][low:high][keep] for name in old_table
+                                                                       if name not in ['sections', 'number', 'credits']}))
+
+            # every other schedule has a first coreq whose section is new, so search each of those separately:
+            # unchanged sections before that coreq, new ones in it, and any section after it
+            splits = []
+            for m in range(len(coreqs)):
+                changed = [f for f in coreqs[m] if f not in unchanged]
+                if changed != []:
+                    splits.append([[f for f in coreq if f in unchanged] for coreq in coreqs[:m]] + [changed] + coreqs[m + 1:])
+            if splits == [] and stats is not None:
+                stats.advance(coreqs)
+            for n, split in enumerate(splits):
+                planned.append(len(tasks))
+                tasks.append((number, credits, split, coreqs if n == len(splits) - 1 else None))
+
+        searched = self.table_searches(tasks, workers, stats)
+        found = []  # (number, credits, schedules, metrics)
+        for f in planned:
+            if isinstance(f, int):
+                found += searched[f]
+            else:
+                found.append(f)
+
+        rows = []
+        numbers = []
+        credit_columns = []
+        metric_columns = []
+        for number, credits, chunk, metrics in found:
+            rows.append(chunk)
+            numbers.append(np.full(len(chunk), number, dtype=np.int32))
+            credit_columns.append(np.full(len(chunk), float(credits)))
+            metric_columns.append(metrics)
+
+        width = max([f.shape[1] for f in rows], default=0)
+        table = {}
+        table['sections'] = np.full((sum([len(f) for f in rows]), width), -1, dtype=np.int32)
+        position = 0
+        for chunk in rows:
+            table['sections'][position:position + len(chunk), :chunk.shape[1]] = chunk
+            position += len(chunk)
+        table['number'] = np.concatenate(numbers) if numbers != [] else np.zeros(0, dtype=np.int32)
+        table['credits'] = np.concatenate(credit_columns) if credit_columns != [] else np.zeros(0)
+        if metric_columns != []:
+            for name in metric_columns[0]:
+                table[name] = np.concatenate([f[name] for f in metric_columns])
+        else:
+            # no rows of one section each, since score() takes the min and max across each row
+            for name, column in self.score(np.zeros((0, 1), dtype=np.int32)).items():
+                table[name] = column
+        # the counts are small, so store them in fewer bytes
+        for name, dtype in [('travel_time', np.int32), ('early_morns', np.int8), ('late_nights', np.int8), ('sleepless', np.int8)]:
+            table[name] = table[name].astype(dtype)
+        return table
+
+    def table_searches(self, tasks, workers=1, stats=None):
+        '''Run the searches planned by schedule_table(), each a (number, credits, coreqs, whole) task,
+        where whole is the coreqs of the combination to count as searched once the task is done, or None.
+        Returns a list of the (number, credits, schedules, metrics) chunks found by each task, in order.
+        With more than one worker, they're searched in a pool of worker processes, as in parallel_rank().'''
+        if workers <= 1:
+            searched = []
+            for number, credits, coreqs, whole in tasks:
+                searched.append(list(self.scored_schedules([(number, credits, coreqs)], no_saturdays=False, no_sleepless=False,
+                                                           stats=stats, parts=True)))
+                if stats is not None and whole is not None:
+                    stats.advance(whole)
+            return searched
+
+        parts = []  # (position in tasks, (number, credits, coreqs), whole once it's the last part of its task or else None)
+        for position, (number, credits, coreqs, whole) in enumerate(tasks):
+            pieces = [coreqs]
+            # too few searches to keep the workers busy, so split each one by the sections of the coreq search() places first
+            # out of those with a choice of sections, which finds the schedules in the same order as searching it whole
+            choices = [m for m in range(len(coreqs)) if len(coreqs[m]) > 1]
+            if len(tasks) < 4 * workers and choices != []:
+                m = min(choices, key=lambda x: len(coreqs[x]))
+                pieces = [coreqs[:m] + [[section]] + coreqs[m + 1:] for section in coreqs[m]]
+            for n, piece in enumerate(pieces):
+                parts.append((position, (number, credits, piece), whole if n == len(pieces) - 1 else None))
+
+        searched = [[] for f in tasks]
+        with ProcessPoolExecutor(max_workers=workers, initializer=start_worker, initargs=(self,)) as executor:
+            # each worker gets its own Stats to fill in, if any
+            jobs = [(task, None if stats is None else Stats(memory=stats.memory)) for position, task, whole in parts]
+            for (position, task, whole), result in zip(parts, executor.map(table_worker, jobs, chunksize=max(1, len(jobs) // (8 * workers)))):
+                searched[position] += result[0]
+                self.nodes_expanded += result[1]
+                self.conflicts_pruned += result[2]
+                if stats is not None:
+                    stats.merge(result[3])
+                    if whole is not None:
+                        stats.advance(whole)
+        return searched
+
+    def cache_path(self, cache_dir, min_credits, max_credits):
+        '''Where the table for this input and credit requirement is kept in cache_dir.'''
+        key = json.dumps([CACHE_VERSION, self.input_hash, float(min_credits), float(max_credits)])
+        return os.path.join(cache_dir, hashlib.sha256(key.encode('utf-8')).hexdigest())
+
+    def cached_table(self, cache_dir=None, min_credits=None, max_credits=None, max_bytes=None, previous_dicts=None, stats=None, workers=1):
+        '''Same as schedule_table(), but saved in cache_dir, which defaults to CACHE_DIR, and loaded from there next time.
+        A table is keyed by a hash of the input rows and the credit requirement, so changing either one finds the schedules again,
+        while changing only the rules, the ranking, or the output reuses them. Loaded tables are memory-mapped, not read into memory.
+        If the table isn't cached yet but the one for previous_dicts, the input rows of an earlier run, still is,
+        only the schedules affected by the differences are searched for, see schedule_table().
+        Afterward, the least recently used tables are deleted until the cache is no bigger than max_bytes, which defaults to CACHE_MAX_BYTES.
+        stats and workers are passed on to schedule_table(), and stats also times saving and loading the table.'''
+        if cache_dir is None:
+            cache_dir = CACHE_DIR
+        if min_credits is None:
+            min_credits = MIN_CREDITS
+        if max_credits is None:
+            max_credits = MAX_CREDITS
+        if max_bytes is None:
+            max_bytes = CACHE_MAX_BYTES
+        path = self.cache_path(cache_dir, min_credits, max_credits)
+
+        if os.path.isdir(path):
+            os.utime(path)
+        else:
+            previous = None
+            if previous_dicts is not None:
+                generator = ScheduleGenerator(previous_dicts)
+                old_path = generator.cache_path(cache_dir, min_credits, max_credits)
+                if os.path.isdir(old_path):
+                    previous = (generator, load_table(old_path))
+            table = self.schedule_table(min_credits, max_credits, previous, stats, workers)
+            if stats is not None:
+                stats.begin('save')
+            save_table(path, table)
+            if stats is not None:
+                stats.end()
+        if stats is not None:
+            stats.begin('load')
+        table = load_table(path)
+        evict_cache(cache_dir, max_bytes, keep=path)
+        if stats is not None:
+            stats.end()
+        return table
+
+    def rank_table(self, table, k=10, pipeline=None, stats=None):
+        '''Same as rank(), but picks the top k and bottom k out of a table from schedule_table() instead of searching,
+        after applying all of the Pipeline's filters to it. Returns the two lists of payloads, best first, as Ranking.results() would.'''
+        if pipeline is None:
+            pipeline = Pipeline()
+        if stats is not None:
+            stats.begin('filter')
+        found = pipeline.keep(table, pipeline.blocked_sections(self))
+        if stats is not None:
+            stats.end()
+            stats.counters['schedules kept'] += len(found)
+            stats.begin('rank')
+        keys = pipeline.key(table, found)
+        sections = table['sections'][found]
+        numbers = table['number'][found]
+
+        def best(keys, sections, numbers):
+            # only sort the schedules that could make the top k, which is every one tied with the kth best or better
+            picked = np.arange(len(keys))
+            if len(keys) > k:
+                threshold = np.partition(-keys, k - 1)[k - 1]
+                picked = np.flatnonzero(-keys <= threshold)
+            # ties are broken by the order the schedules would have been generated in, as in rank()
+            order = np.lexsort([sections[picked, f] for f in range(sections.shape[1] - 1, -1, -1)] + [numbers[picked], -keys[picked]])
+            return found[picked[order[:k]]]
+
+        def payload(n):
+            row = table['sections'][n]
+            return (tuple(row[row >= 0].tolist()), table['credits'][n].item(),
+                    {name: table[name][n].item() for name in table if name not in ['sections', 'number', 'credits']})
+
+        preferred = [payload(f) for f in best(keys, sections, numbers)]
+        # the bottom k are the top k with every comparison flipped, and are listed worst first
+        undesirable = [payload(f) for f in best(-keys, -sections, -numbers)]
+        if stats is not None:
+            stats.end()
+        return preferred, undesirable
+
+    def make_schedule(self, payload):
+        '''Turn a ranked (row of section indices, credits, properties) payload into a Schedule object.'''
+        row, credits, metrics = payload
+        schedule = Schedule(tuple(self.sections[f] for f in row))
+        schedule.credits = credits
+        for name in metrics:
+            setattr(schedule, name, metrics[name])
+        return schedule
+
+    def constraints(self, pipeline=None):
+        '''The filters of the Pipeline, which defaults to Pipeline(), as constraints on the sections, for the queries below.
+        Returns (allowed, compatible), where allowed has a bit set for every section the filters allow on its own,
+        and compatible[i] has a bit set for every allowed section that can be in the same schedule as section i.
+        Every filter depends only on single sections or on pairs of them: a sleepless night is a night class in one section
+        followed by an early class in another, or in the same one, the next morning.'''
+        if pipeline is None:
+            pipeline = Pipeline()
+        options = pipeline.search_options()
+        early_days = np.array(self.section_early_days, dtype=int)
+        late_days = np.array(self.section_late_days, dtype=int)
+        # sleepless[i, j] is True for a night class in section i before an early class in section j
+        sleepless = ((late_days[:, None] << 1) & early_days[None, :]) != 0
+        if not options['no_sleepless']:
+            sleepless[:] = False
+
+        allowed = ~pipeline.blocked_sections(self)[:-1] & ~np.diagonal(sleepless)
+        if options['no_saturdays']:
+            allowed &= ~np.array(self.section_saturday, dtype=bool)
+        if options['no_mornings']:
+            allowed &= early_days == 0
+        if options['no_nights']:
+            allowed &= late_days == 0
+        rows = ~(self.conflicts | sleepless | sleepless.T) & allowed[None, :]
+
+        pack = lambda row: int.from_bytes(np.packbits(row, bitorder='little').tobytes(), 'little')
+        return pack(allowed), [pack(row) for row in rows]
+
+    def constrained_combinations(self, min_credits=None, max_credits=None, pipeline=None):
+        '''Generate (number, credits, coreqs, domains, components, compatible) for each combination that fulfills the credit requirement,
+        where domains hold the sections of each coreq left after arc_consistency(), and components come from constraint_components().
+        Combinations that arc_consistency() finds have no schedule at all are skipped.'''
+        allowed, compatible = self.constraints(pipeline)
+        for number, credits, coreqs in self.combinations(min_credits, max_credits):
+            domains = [sum([1 << f for f in coreq]) & allowed for coreq in coreqs]
+            domains = arc_consistency(domains, compatible)
+            if domains is not None:
+                yield number, credits, coreqs, domains, constraint_components(domains, compatible), compatible
+
+    def any_schedule(self, min_credits=None, max_credits=None, pipeline=None):
+        '''Returns a Schedule that fulfills the credit requirement, which defaults to MIN_CREDITS and MAX_CREDITS,
+        and that the Pipeline's filters would keep, or None if there isn't one. The Pipeline defaults to Pipeline().'''
+        for number, credits, coreqs, domains, components, compatible in self.constrained_combinations(min_credits, max_credits, pipeline):
+            row = [None] * len(coreqs)
+            for component in components:
+                solution = find_solution([domains[p] for p in component], compatible)
+                if solution is None:
+                    break
+                for p, x in zip(component, solution):
+                    row[p] = x
+            else:
+                metrics = self.score(np.array([row], dtype=np.int32))
+                return self.make_schedule((tuple(row), credits, {name: metrics[name][0].item() for name in metrics}))
+        return None
+
+    def count_schedules(self, min_credits=None, max_credits=None, pipeline=None, alternates=True):
+        '''Returns how many schedules fulfill the credit requirement and would be kept by the Pipeline, without finding them
+        one at a time. Each choice of a section or one of its alternates counts as a schedule of its own; with alternates=False,
+        sections meeting at the same times count once, the same as generate_schedules() would rank. Groups of coreqs that don't
+        constrain each other are counted separately and multiplied, and each group's count is remembered for the next combination it turns up in.'''
+        weights = [1 + len(f.alternates) if alternates else 1 for f in self.sections]
+        memo = {}
+        total = 0
+        for number, credits, coreqs, domains, components, compatible in self.constrained_combinations(min_credits, max_credits, pipeline):
+            product = 1
+            for component in components:
+                product *= count_solutions([domains[p] for p in component], compatible, weights, memo)
+                if product == 0:
+                    break
+            total += product
+        return total
+
+    def infeasible_sections(self, min_credits=None, max_credits=None, pipeline=None):
+        '''Returns the list of Sections that aren't in any schedule that fulfills the credit requirement and would be kept by the Pipeline,
+        so students can be warned about them early. A section listed stands for its alternates as well.'''
+        memo = {}   # the domains of a group of coreqs -> their supported sections
+        supported = 0
+        for number, credits, coreqs, domains, components, compatible in self.constrained_combinations(min_credits, max_credits, pipeline):
+            found = 0
+            for component in components:
+                key = tuple(domains[p] for p in component)
+                if key not in memo:
+                    memo[key] = supported_sections(list(key), compatible)
+                if 0 in memo[key]:
+                    # this group has no solution, so neither does the combination
+                    found = 0
+                    break
+                for f in memo[key]:
+                    found |= f
+            supported |= found
+        return [f for f in self.sections if not supported >> f.index & 1]
+
+    def generate_schedules(self, k=10, no_mornings=False, no_nights=False, optimize=False, workers=1, min_credits=None, max_credits=None,
+                           output_dir=None, output='png', cache_dir=None, snapshot=None, pipeline=None, stats=None):
+        '''Find, rank, and save images of the top k and bottom k schedules, only ever keeping those in memory.
+        Which schedules are kept and how they're ranked is up to the Pipeline, which defaults to one with the Saturday and sleepless filters,
+        plus the early morning and late night ones with no_mornings and no_nights, ranking by fullness.
+        The credit requirement defaults to MIN_CREDITS and MAX_CREDITS.
+        output_dir and output are passed on to save_images().
+        With optimize, only the top k are found, and branches of the search that can't beat the kth best so far are skipped.
+        With more than one worker, the search and the drawing are spread across that many processes.
+        The number of search nodes expanded and pruned is kept in nodes_expanded and nodes_pruned.
+        With cache_dir, every conflict-free schedule is saved there the first time, see cached_table(),
+        and later runs with the same input and credit requirement rank the saved schedules without searching at all.
+        snapshot is the path of a JSON file holding the input rows of the previous run, which is overwritten with this run's.
+        If the input has changed since, only the schedules affected are searched for, reusing the previous run's cached table.
+        cache_dir defaults to CACHE_DIR when there's a snapshot.
+        With stats, a Stats object, each stage is counted, timed, and reported on as it goes, and the Stats is returned.'''
+        if pipeline is None:
+            pipeline = Pipeline(['saturday', 'sleepless'] + ['mornings'] * no_mornings + ['nights'] * no_nights)
+        assert not optimize or pipeline.bounded(), 'optimize only works when ranking by fullness alone!'
+        self.nodes_expanded = 0
+        self.nodes_pruned = 0
+        self.conflicts_pruned = 0
+        if stats is not None:
+            stats.start()
+        if snapshot is not None and cache_dir is None:
+            cache_dir = CACHE_DIR
+        if cache_dir is not None:
+            previous_dicts = None
+            if snapshot is not None and os.path.exists(snapshot):
+                with open(snapshot, encoding='utf-8') as snapshot_file:
+                    previous_dicts = json.load(snapshot_file)
+            table = self.cached_table(cache_dir, min_credits, max_credits, previous_dicts=previous_dicts, stats=stats, workers=workers)
+            preferred, undesirable = self.rank_table(table, k, pipeline, stats)
+            if snapshot is not None:
+                if os.path.dirname(snapshot) != '' and not os.path.exists(os.path.dirname(snapshot)):
+                    os.makedirs(os.path.dirname(snapshot))
+                with open(snapshot + '.tmp', 'w', encoding='utf-8') as snapshot_file:
+                    json.dump(self.input_dicts, snapshot_file)
+                os.replace(snapshot + '.tmp', snapshot)
+        else:
+            combinations = self.combinations(min_credits, max_credits, stats)
+            if stats is not None:
+                stats.begin('combinations')
+                combinations = list(combinations)
+                stats.end()
+            if workers > 1:
+                preferred, undesirable = self.parallel_rank(workers, combinations, k, pipeline, optimize, stats)
+            else:
+                preferred, undesirable = self.rank(combinations, k, pipeline, optimize, stats)
+            preferred = preferred.results()
+            undesirable = undesirable.results()
+        self.preferred = [self.make_schedule(f) for f in preferred]
+        self.undesirable = [self.make_schedule(f) for f in undesirable]
 
         # print out the fullness and credit load of the top 10 and bottom 10 ranked schedules, for comparison
         """
-        for schedule in self.schedules[:10]:
+        for schedule in self.preferred:
             print(str(round(schedule.total_time / 60, 2)) + '\t' + str(round(schedule.class_time / schedule.total_time, 4)) + '\t' + str(schedule.credits) + '\t' + str(schedule.total_time) + '\t' + str(schedule.class_time) + '\t' + str(schedule.travel_time))
         print('\n\n')
-        for schedule in self.schedules[-10:]:
+        for schedule in self.undesirable:
             print(str(round(schedule.total_time / 60, 2)) + '\t' + str(round(schedule.class_time / schedule.total_time, 4)) + '\t' + str(schedule.credits))
         """
-        
-        
-        # the following code saves to images schedules that are different
-            # for when you have two sections of the same class at the same time
-            # to prevent what can be considered as "identical" schedules to both be saved to images
-            # the skipped numbers will indicate if you have more than one section for a particular time
-        already_printed = []
-        x = 0
-        while len(already_printed) < 10 and x < len(self.schedules):
-            match = False
-            for schedule in already_printed:
-                if self.schedules[x] == schedule:
-                    match = True
-            if match == False:
-                already_printed.append(self.schedules[x])
-                self.schedules[x].save_image('preferred ' + str(x).zfill(2))
-            x += 1
-
-        already_printed = []
-        x = 0
-        while len(already_printed) < 10 and x < len(self.schedules):
-            match = False
-            for schedule in already_printed:
-                if self.schedules[-x -1] == schedule:
-                    match = True
-            if match == False:
-                already_printed.append(self.schedules[-x -1])
-                self.schedules[-x -1].save_image('undesirable ' + str(x + 1).zfill(2))
-            x += 1
+
+        # sections at the same time as the ones shown are listed on the images, so every schedule saved looks different
+        named = [('preferred ' + str(x).zfill(2), f) for x, f in enumerate(self.preferred)]
+        named += [('undesirable ' + str(x + 1).zfill(2), f) for x, f in enumerate(self.undesirable)]
+        self.save_images(named, output_dir, workers, output, stats)
+
+        if stats is not None:
+            stats.counters['candidates'] += self.nodes_expanded
+            stats.counters['conflicts pruned'] += self.conflicts_pruned
+            stats.counters['bound pruned'] += self.nodes_pruned
+            stats.finish()
+        return stats
+
+    def save_images(self, named_schedules, output_dir=None, workers=1, output='png', stats=None):
+        '''Given a list of (filename, Schedule), save each schedule as a PNG image in output_dir, which defaults to OUTPUT_DIR.
+        With output='sheet', they're saved together as one contact sheet image instead,
+        and with output='pdf', as one PDF with a page for each schedule.
+        With more than one worker, the images are drawn and encoded that many at a time in separate processes.
+        With stats, the time taken and the number of files written are counted.'''
+        if stats is not None:
+            stats.begin('render')
+        if output_dir is None:
+            output_dir = OUTPUT_DIR
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+        # the day columns are tinted the same in every image, whichever process draws it
+        tints = column_tints()
+        jobs = []
+        for filename, schedule in named_schedules:
+            path = None
+            if output == 'png':
+                path = os.path.join(output_dir, filename + '.png')
+            jobs.append((schedule.describe(), path, output == 'sheet', tints))
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                images = list(executor.map(render_worker, jobs))
+        else:
+            images = [render_worker(f) for f in jobs]
+
+        if output == 'sheet' and images != []:
+            # a grid of thumbnails, five across, each with its filename underneath
+            columns = 5
+            # a schedule meeting on the weekend has a wider page
+            width = max([f.width for f in images])
+            height = images[0].height + 30
+            rows = (len(images) + columns - 1) // columns
+            sheet = Image.new('RGB', (columns * width, rows * height), (255, 255, 255))
+            draw = ImageDraw.Draw(sheet)
+            for n, image in enumerate(images):
+                x = (n % columns) * width
+                y = (n // columns) * height
+                sheet.paste(image, (x, y))
+                draw.text((x + 10, y + image.height + 5), named_schedules[n][0], (0, 0, 0), font=load_font())
+            del draw
+            sheet.save(os.path.join(output_dir, 'schedules.png'), 'PNG')
+        if output == 'pdf' and images != []:
+            images[0].save(os.path.join(output_dir, 'schedules.pdf'), 'PDF', save_all=True, append_images=images[1:], resolution=150)
+
+        if stats is not None:
+            stats.end()
+            stats.counters['images written'] += len(images) if output == 'png' else min(len(images), 1)
+
+def start_worker(generator):
+    '''Runs once in each worker process, to receive the compact generator sent over by parallel_rank() or table_searches().'''
+    global worker_generator
+    worker_generator = generator
+
+def search_worker(job):
+    '''Rank a share of the combinations in a worker process. Returns the two Rankings, the node counts, and the Stats, if any.'''
+    combinations, k, pipeline, optimize, stats = job
+    worker_generator.nodes_expanded = 0
+    worker_generator.nodes_pruned = 0
+    worker_generator.conflicts_pruned = 0
+    if stats is not None:
+        stats.start()
+    preferred, undesirable = worker_generator.rank(combinations, k, pipeline, optimize, stats)
+    if stats is not None:
+        # the tracing is left running, since the same worker process will take the next job too
+        stats.tracing = False
+    return preferred, undesirable, worker_generator.nodes_expanded, worker_generator.nodes_pruned, worker_generator.conflicts_pruned, stats
+
+def table_worker(job):
+    '''Search one of ScheduleGenerator.table_searches()'s tasks in a worker process.
+    Returns the scored chunks found, the node counts, and the Stats, if any.'''
+    task, stats = job
+    worker_generator.nodes_expanded = 0
+    worker_generator.conflicts_pruned = 0
+    if stats is not None:
+        stats.start()
+    chunks = list(worker_generator.scored_schedules([task], no_saturdays=False, no_sleepless=False, stats=stats, parts=True))
+    if stats is not None:
+        # the tracing is left running, since the same worker process will take the next job too
+        stats.tracing = False
+    return chunks, worker_generator.nodes_expanded, worker_generator.conflicts_pruned, stats
+
+def save_table(path, table):
+    '''Save each array of a table from ScheduleGenerator.schedule_table() as its own .npy file in the directory path.
+    The directory is written under a temporary name and renamed once complete, so a half-written table is never loaded.'''
+    temporary = path + '.' + str(os.getpid()) + '.tmp'
+    os.makedirs(temporary)
+    for name, column in table.items():
+        np.save(os.path.join(temporary, name + '.npy'), column)
+    try:
+        os.rename(temporary, path)
+    except OSError:
+        # another process saved the same table first
+        shutil.rmtree(temporary)
+
+def load_table(path):
+    '''Load a table saved by save_table(), with every array memory-mapped read-only.'''
+    table = {}
+    for filename in sorted(os.listdir(path)):
+        if filename.endswith('.npy'):
+            table[filename[:-len('.npy')]] = np.load(os.path.join(path, filename), mmap_mode='r')
+    return table
+
+def evict_cache(cache_dir, max_bytes, keep=None):
+    '''Delete the least recently used tables in cache_dir until the ones left take up no more than max_bytes, never deleting keep.
+    Pass max_bytes=0 to empty the cache.'''
+    if not os.path.isdir(cache_dir):
+        return
+    entries = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.endswith('.tmp') or name == 'snapshots' or not os.path.isdir(path):
+            continue
+        size = sum([os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)])
+        entries.append((os.path.getmtime(path), path, size))
+    total = sum([f[2] for f in entries])
+    for used, path, size in sorted(entries):
+        if total <= max_bytes:
+            break
+        if keep is not None and os.path.abspath(path) == os.path.abspath(keep):
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
 
 class Schedule:
+    # only the schedules picked for images become Schedule objects, the rest stay rows of section indices, see ScheduleGenerator.rank()
+    __slots__ = ('sections', 'credits', 'early_morns', 'late_nights', 'sleepless', 'saturday_class', 'total_time', 'travel_time', 'class_time',
+                 'night_travel_time', 'weight')
+
     def __init__(self, sections_list):
         self.sections = sections_list   # list of Section objects
         self.credits = 0
@@ -246,12 +1572,13 @@ class Schedule:
         self.total_time = 0
         self.travel_time = 0
         self.class_time = 0
+        self.night_travel_time = 0  # extra travel time for days ending late, see night_travel()
 
         # weight = sum of ((gaussian(start) + gaussian(end)) / 2) * duration
         self.weight = 0
 
     def __str__(self):
-        return '\n'.join([f.course_code + ' ' + f.course_name + ' ' + f.section for f in self.sections])
+        return '\n'.join([str(f) for f in self.sections])
 
     def __eq__(self, other):
         self_blocks = [f.blocks for f in self.sections]
@@ -277,15 +1604,11 @@ class Schedule:
                         return True
         return False
 
-    def gaussian(self, datetime):
-        # 8 AM to 1 PM to 6 PM
+    def gaussian(self, minutes):
         # bug: will favor schedules with more overall credits/classes, so normalize to total duration of classes?
-        minutes = (datetime - datetime.strptime('8:00AM', '%I:%M%p')).seconds / 60 # minutes past 8:00
+        minutes = (minutes - 8 * 60) % (24 * 60)   # minutes past 8:00
         # print(minutes)
-        mu = 0
-        sig = 1
-        x = -3 + (minutes / 600) * 6
-        return np.exp(-np.power(x - mu, 2.) / (2 * np.power(sig, 2.))) - 0.25
+        return gaussian(minutes)
 
     def calculate(self):
         '''Update the attributes pertaining to the schedule.'''
@@ -305,18 +1628,15 @@ class Schedule:
                     self.class_time += block.duration
                     self.total_time += block.duration
                 for n in range(0, len(day) - 1):
-                    break_length = (day[n + 1].start - day[n].end).seconds / 60    # convert timedelta to minutes
+                    break_length = (day[n + 1].start - day[n].end) % (24 * 60)
                     self.total_time += break_length
+                self.night_travel_time += float(night_travel(max([f.end for f in day])))
 
         early_morn = [False, False, False, False, False, False, False]
         late_night = [False, False, False, False, False, False, False]
         for n, day in enumerate(days):
-            start = datetime.strptime(str(n + 1) + ' ' + '12:00AM', '%d %I:%M%p')
-            end   = datetime.strptime(str(n + 1) + ' ' + '09:00AM', '%d %I:%M%p')
-            morning = Block(n + 1, start, end, '')
-            start = datetime.strptime(str(n + 1) + ' ' + '05:00PM', '%d %I:%M%p')
-            end   = datetime.strptime(str(n + 1) + ' ' + '11:59PM', '%d %I:%M%p')
-            night = Block(n + 1, start, end, '')
+            morning = Block(n + 1, parse_time('12:00AM'), parse_time('9:00AM'), '')
+            night = Block(n + 1, parse_time('5:00PM'), parse_time('11:59PM'), '')
             for block in day:
                 if block == morning:
                     early_morn[n] = True
@@ -331,106 +1651,154 @@ class Schedule:
         for block in blocks:
             self.weight += ((self.gaussian(block.start) + self.gaussian(block.end)) / 2) * block.duration / 60
 
+    def describe(self):
+        '''Returns a list of (course code, section, course name, days and times) for each section, all that's needed to draw it.'''
+        return [(f.course_code, ' / '.join([f.section] + f.alternates), f.course_name, f.days_and_times) for f in self.sections]
+
     def datetime_to_coords(self, string):
-        '''Given a string of form 'MoTh 8:10AM - 9:25AM'
-        return a list of coords of form (x1, y1, x2, y2) for outputting to PNG.'''
-        split = string.split(' ')
-        output_list = []
-        for n in range(int(len(split[0]) / 2)): # for weekdays in the weekdays string
-            decimal_day = ['Mo', 'Tu', 'We', 'Th', 'Fr', 'Sa', 'Su'].index(split[0][n * 2:(n + 1)*2])
-            assert decimal_day <= 4, 'No Saturdays or Sundays allowed!'
-            x1 = int(150 * (0.875 + decimal_day * (1.375)))
-            x2 = int(150 * (0.875 + decimal_day * (1.375) + 1.25))
-            start = datetime.strptime(split[1], '%I' + ':' + '%M' + '%p')
-            end = datetime.strptime(split[3], '%I' + ':' + '%M' + '%p')
-            assert start < end, 'start time is later than end time!'
-
-            y1 = 104 + 10 * ((int(datetime.strftime(start, '%H')) - 8) * 12 + round((int(datetime.strftime(start, '%M')) / 5)))
-            y2 = 104 + 10 * ((int(datetime.strftime(end, '%H')) - 8) * 12 + round((int(datetime.strftime(end, '%M')) / 5)))
-            output_list.append((x1, int(y1), x2, int(y2)))
-        return output_list
-
-    def save_image(self, filename):   # sections_dicts, image_filename
-        output_dir = OUTPUT_DIR
-        if not os.path.exists(OUTPUT_DIR):
-            os.makedirs(OUTPUT_DIR)
-        image_filename = filename
-
-        font = ImageFont.truetype("calibri.ttf", 19)
-        font_color = (0, 0, 0)
-
-        new_image = Image.new('RGB', (int(8.5 * 150), 11 * 150))
-        draw = ImageDraw.Draw(new_image)
-        draw.rectangle((0, 0, int(8.5 * 150), 11 * 150), (255, 255, 255, 255))        
-
-        # write the hours
-        for x in range(8, 20):
-            hour = x % 12
-            if hour == 0:
-                hour = 12
-            hour = str(hour)
-            if int(x / 12) == 1:
-                ampm = 'PM'
-            else:
-                ampm = 'AM'
-            string = hour + ':00 ' + ampm
-            draw.text((int(0.25 * 150), int(((x - 8) * 120) + 0.25 * 150 + 67)), string, font_color, font=font)
-            draw.text((int((8.5 - 0.25 - 0.5) * 150), int(((x - 8) * 120) + 0.25 * 150 + 67)), string, font_color, font=font)
-
-        # draw the major and minor hour lines
-        for x in range(8, 21):
-            draw.line((0, int((x - 8) * 120 + 0.25 * 150 + 67), int(8.5 * 150), int((x - 8) * 120 + 0.25 * 150 + 67)), fill=(128, 128, 128), width=3)
-        for x in range(8, 20):
-            draw.line((0, int((x - 8) * 120 + 0.25 * 150 + 67 + 60), int(8.5 * 150), int((x - 8) * 120 + 0.25 * 150 + 67 + 60)), fill=(192, 192, 192), width=3)
-
-        # coloring the columns for the days
-        for x in range(5):
-            x1 = int(150 * (0.25 + 0.5 + 0.125 + x * (0.125 + 1.25)))
-            y1 = int(150 * (0.25) + 67)
-            x2 = int(150 * (0.25 + 0.5 + 0.125 + x * (0.125 + 1.25) + 1.25))
-            y2 = int(150 * (11 - 0.25) - 67)
-            drw = ImageDraw.Draw(new_image, 'RGBA')
-            drw.rectangle((int(150 * (0.25 + 0.5 + 0.125 + x * (0.125 + 1.25))), int(150 * (0.25) + 67), int(150 * (0.25 + 0.5 + 0.125 + x * (0.125 + 1.25) + 1.25)), int(150 * (11 - 0.25) - 67)), (random.randint(63, 191), random.randint(63, 191), random.randint(63, 191), 16))
-        del drw
-
-        # write in the days
-        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-        for x in range(5):
-            spaces = ' ' * (21 - len(days[x]))
-            draw.text((int(150 * (0.25 + 0.5 + 0.125 + x * (0.125 + 1.25))), int(150 * (0.25) + 67 - 20)), spaces + days[x], font_color, font=font)
-
-        # generate a semi-random palette of colors
-        colors = []
-        shift = random.randint(0, 999) / 1000
-        for x in range(int(len(self.sections) * 2)):
-            h = x / int((len(self.sections) * 2))
-            r, g, b = colorsys.hsv_to_rgb((h + shift) % 1, 0.3, 1.0)
-            colors.append((round(255 * r), round(255 * g), round(255 * b)))
-
-        # write course information onto each box in the output image
-        indent = 4
-        line_length = 21
-        for n, section in enumerate(self.sections):
-            input_strings = [section.course_code, section.section, section.course_name, section.days_and_times[section.days_and_times.index(' ') + 1:]]
-            printing_strings = []
-            for string in input_strings:
-                head = string[:indent]
-                string = string[indent:]
-                for x in range(int(len(string) / (line_length - indent)) + 1):
-                    if x == 0:
-                        printing_strings.append(head + string[x * (line_length - indent) : (x + 1) * (line_length - indent)])
-                    else:
-                        printing_strings.append(' ' * indent + string[x * (line_length - indent) : (x + 1) * (line_length - indent)])
-
-            color = colors[n]
-            for block in self.datetime_to_coords(section.days_and_times):
-                draw.rectangle(block, color)
-                for m, string in enumerate(printing_strings):
-                    draw.text((block[0] + 3, block[1] + 2 + (m * 20)), string, font_color, font=font)
-
-        del draw
-
-        new_image.save(os.path.join(output_dir, image_filename + '.png'), 'PNG')
+        return datetime_to_coords(string)
+
+    def render(self):
+        '''Returns the schedule drawn as a PIL image.'''
+        return draw_schedule(self.describe())
+
+    def save_image(self, filename, output_dir=None):   # sections_dicts, image_filename
+        if output_dir is None:
+            output_dir = OUTPUT_DIR
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        self.render().save(os.path.join(output_dir, filename + '.png'), 'PNG')
+
+def datetime_to_coords(string):
+    '''Given a string of form 'MoTh 8:10AM - 9:25AM'
+    return a list of coords of form (x1, y1, x2, y2) for outputting to PNG.'''
+    output_list = []
+    for date, start, end in parse_days_and_times(string):
+        decimal_day = date - 1
+        x1 = int(150 * (0.875 + decimal_day * (1.375)))
+        x2 = int(150 * (0.875 + decimal_day * (1.375) + 1.25))
+
+        y1 = 104 + 10 * ((start // 60 - 8) * 12 + round((start % 60) / 5))
+        y2 = 104 + 10 * ((end // 60 - 8) * 12 + round((end % 60) / 5))
+        output_list.append((x1, int(y1), x2, int(y2)))
+    return output_list
+
+@functools.lru_cache(maxsize=None)
+def load_font():
+    return ImageFont.truetype("calibri.ttf", 19)
+
+def column_tints():
+    '''Pick a random translucent tint for each day column of the page, see page_background().'''
+    return tuple((random.randint(63, 191), random.randint(63, 191), random.randint(63, 191), 16) for x in range(7))
+
+def page_days(sections):
+    '''Given the list from Schedule.describe(), return how many day columns its page needs:
+    Monday to Friday, and Saturday or Sunday only if something meets then.'''
+    return max([5] + [date for f in sections for date, start, end in parse_days_and_times(f[3])])
+
+@functools.lru_cache(maxsize=4)
+def page_background(tints, days=5):
+    '''Draw the parts of the page that are the same for every schedule: the hours, the hour lines, and the day columns tinted with tints,
+    days of them starting from Monday. The page is widened by a column for each day past Friday.
+    This is only done once per process for each set of tints and days, and every image starts from a copy of it.'''
+    font = load_font()
+    font_color = (0, 0, 0)
+
+    width = int((8.5 + (days - 5) * 1.375) * 150)
+    new_image = Image.new('RGB', (width, 11 * 150))
+    draw = ImageDraw.Draw(new_image)
+    draw.rectangle((0, 0, width, 11 * 150), (255, 255, 255, 255))
+
+    # write the hours
+    for x in range(8, 20):
+        hour = x % 12
+        if hour == 0:
+            hour = 12
+        hour = str(hour)
+        if int(x / 12) == 1:
+            ampm = 'PM'
+        else:
+            ampm = 'AM'
+        string = hour + ':00 ' + ampm
+        draw.text((int(0.25 * 150), int(((x - 8) * 120) + 0.25 * 150 + 67)), string, font_color, font=font)
+        draw.text((width - int((0.25 + 0.5) * 150), int(((x - 8) * 120) + 0.25 * 150 + 67)), string, font_color, font=font)
+
+    # draw the major and minor hour lines
+    for x in range(8, 21):
+        draw.line((0, int((x - 8) * 120 + 0.25 * 150 + 67), width, int((x - 8) * 120 + 0.25 * 150 + 67)), fill=(128, 128, 128), width=3)
+    for x in range(8, 20):
+        draw.line((0, int((x - 8) * 120 + 0.25 * 150 + 67 + 60), width, int((x - 8) * 120 + 0.25 * 150 + 67 + 60)), fill=(192, 192, 192), width=3)
+
+    # coloring the columns for the days
+    drw = ImageDraw.Draw(new_image, 'RGBA')
+    for x in range(days):
+        drw.rectangle((int(150 * (0.25 + 0.5 + 0.125 + x * (0.125 + 1.25))), int(150 * (0.25) + 67), int(150 * (0.25 + 0.5 + 0.125 + x * (0.125 + 1.25) + 1.25)), int(150 * (11 - 0.25) - 67)), tints[x])
+    del drw
+
+    # write in the days
+    names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    for x in range(days):
+        spaces = ' ' * (21 - len(names[x]))
+        draw.text((int(150 * (0.25 + 0.5 + 0.125 + x * (0.125 + 1.25))), int(150 * (0.25) + 67 - 20)), spaces + names[x], font_color, font=font)
+
+    del draw
+    return new_image
+
+def draw_schedule(sections, tints=None):
+    '''Given the list from Schedule.describe(), return the schedule drawn onto a copy of the page background,
+    with the day columns tinted with tints from column_tints(), or new random ones.'''
+    font = load_font()
+    font_color = (0, 0, 0)
+
+    if tints is None:
+        tints = column_tints()
+    new_image = page_background(tints, page_days(sections)).copy()
+    draw = ImageDraw.Draw(new_image)
+
+    # generate a semi-random palette of colors
+    colors = []
+    shift = random.randint(0, 999) / 1000
+    for x in range(int(len(sections) * 2)):
+        h = x / int((len(sections) * 2))
+        r, g, b = colorsys.hsv_to_rgb((h + shift) % 1, 0.3, 1.0)
+        colors.append((round(255 * r), round(255 * g), round(255 * b)))
+
+    # write course information onto each box in the output image
+    indent = 4
+    line_length = 21
+    for n, (course_code, section, course_name, days_and_times) in enumerate(sections):
+        input_strings = [course_code, section, course_name, days_and_times[days_and_times.index(' ') + 1:]]
+        printing_strings = []
+        for string in input_strings:
+            head = string[:indent]
+            string = string[indent:]
+            for x in range(int(len(string) / (line_length - indent)) + 1):
+                if x == 0:
+                    printing_strings.append(head + string[x * (line_length - indent) : (x + 1) * (line_length - indent)])
+                else:
+                    printing_strings.append(' ' * indent + string[x * (line_length - indent) : (x + 1) * (line_length - indent)])
+
+        color = colors[n]
+        for block in datetime_to_coords(days_and_times):
+            draw.rectangle(block, color)
+            for m, string in enumerate(printing_strings):
+                draw.text((block[0] + 3, block[1] + 2 + (m * 20)), string, font_color, font=font)
+
+    del draw
+    return new_image
+
+def render_worker(job):
+    '''Draw one schedule, possibly in a worker process, see ScheduleGenerator.save_images().
+    job is (Schedule.describe(), path, thumbnail, tints): the image is saved as a PNG to path if there is one,
+    otherwise it's returned, shrunk down if thumbnail is set.'''
+    sections, path, thumbnail, tints = job
+    image = draw_schedule(sections, tints)
+    if path is not None:
+        image.save(path, 'PNG')
+        return None
+    if thumbnail:
+        image.thumbnail((image.width // 4, image.height // 4))
+    return image
 
 def read_csv(path):
     '''Given the path to the default input CSV,
@@ -443,17 +1811,167 @@ def read_csv(path):
     output_lines = []
     labels = input_lines[0].replace('"', '').split('\t')
     for n, element in enumerate(input_lines[1:]):
+        if element.strip() == '':
+            continue
         temp = element.replace('"', '').split('\t')
         line_dict = {}
         for m, label in enumerate(labels):
-            line_dict[label] = temp[m]
+            line_dict[label] = temp[m] if m < len(temp) else ''   # trailing blank cells may be left off
         output_lines.append(line_dict)
     return output_lines
 
-
-# read in data from the CSV
-input_lines = read_csv(INPUT)
-# place the data into the nested classes structure
-fall_2018 = ScheduleGenerator(input_lines)
-# generate, filter, and rank possible schedules
-fall_2018.generate_schedules()
+def read_selections(path):
+    '''Given a directory of students' selection files, or a manifest file listing them,
+    return a list of (student, path to their selection file).
+    In a directory, every .csv, .tsv, or .txt file is a selection, named after the file.
+    A manifest has a line per student with their name and the path to their selection, separated by a tab,
+    or just the path, relative to the manifest.'''
+    if os.path.isdir(path):
+        return [(os.path.splitext(f)[0], os.path.join(path, f)) for f in sorted(os.listdir(path))
+                if os.path.splitext(f)[1].lower() in ['.csv', '.tsv', '.txt']]
+    output = []
+    with open(path, 'r', encoding='utf-8') as manifest:
+        for line in manifest:
+            split = line.strip('\n').split('\t')
+            if split[-1].strip() == '':
+                continue
+            selection = os.path.join(os.path.dirname(path), split[-1].strip())
+            student = split[0].strip() if len(split) > 1 else os.path.splitext(os.path.basename(selection))[0]
+            output.append((student, selection))
+    return output
+
+def start_batch_worker(catalog):
+    '''Runs once in each worker process, to receive the catalog sent over by run_batch().'''
+    global worker_catalog
+    worker_catalog = catalog
+
+def batch_worker(job):
+    '''Generate one student's schedules against the shared catalog. Returns the student, their timings in seconds,
+    and the error that stopped them, if any, as a string, so one bad selection doesn't stop the rest of the batch.'''
+    student, selection, output_dir, options = job
+    start = time.perf_counter()
+    setup = 0
+    try:
+        generator = ScheduleGenerator(worker_catalog.expand(read_csv(selection)), worker_catalog)
+        setup = time.perf_counter() - start
+        if options.get('snapshot') is not None:
+            # each student gets their own snapshot in the folder given
+            options = dict(options, snapshot=os.path.join(options['snapshot'], student + '.json'))
+        generator.generate_schedules(output_dir=output_dir, **options)
+    except Exception as error:
+        if setup == 0:
+            setup = time.perf_counter() - start
+        return student, setup, time.perf_counter() - start - setup, type(error).__name__ + ': ' + str(error)
+    return student, setup, time.perf_counter() - start - setup, None
+
+def run_batch(catalog_path, selections_path, output_root=None, workers=1, **options):
+    '''Generate schedules for many students at once, see read_selections(), each into their own folder under output_root.
+    The catalog is parsed and indexed once and shared by every student, and the students are run workers at a time.
+    The rest of the options are passed on to ScheduleGenerator.generate_schedules(), except that snapshot is a folder,
+    holding a snapshot for each student.
+    A student whose selection can't be run, like one with a course missing from the catalog, is skipped, and the error is listed.
+    Prints and saves a summary of how long each student took, and returns it as a list of (student, setup, generate, error),
+    with the seconds each took and None for error if they succeeded.'''
+    if output_root is None:
+        output_root = OUTPUT_DIR
+    start = time.perf_counter()
+    catalog = Catalog(read_csv(catalog_path))
+    print('Indexed ' + str(len(catalog.sections)) + ' sections in ' + str(round(time.perf_counter() - start, 3)) + ' s')
+
+    jobs = [(student, selection, os.path.join(output_root, student), options) for student, selection in read_selections(selections_path)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=start_batch_worker, initargs=(catalog,)) as executor:
+            summary = list(executor.map(batch_worker, jobs))
+    else:
+        start_batch_worker(catalog)
+        summary = [batch_worker(f) for f in jobs]
+
+    if not os.path.exists(output_root):
+        os.makedirs(output_root)
+    lines = ['Student\tSetup (s)\tGenerate (s)\tTotal (s)\tError']
+    for student, setup, generate, error in summary:
+        lines.append(student + '\t' + str(round(setup, 3)) + '\t' + str(round(generate, 3)) + '\t' + str(round(setup + generate, 3))
+                     + '\t' + ('' if error is None else error.replace('\t', ' ').replace('\n', ' ')))
+    failed = len([f for f in summary if f[3] is not None])
+    lines.append('All ' + str(len(summary)) + ' students\t\t\t' + str(round(time.perf_counter() - start, 3)) + '\t' + str(failed) + ' failed')
+    with open(os.path.join(output_root, 'summary.tsv'), 'w', encoding='utf-8') as output_file:
+        output_file.write('\n'.join(lines) + '\n')
+    print('\n'.join(lines))
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate plausible schedules from the course catalog.')
+    parser.add_argument('--workers', type=int, default=1, help='number of processes to search with (default 1)')
+    parser.add_argument('--output', choices=['png', 'sheet', 'pdf'], default='png',
+                        help='save a PNG image for each schedule, one contact sheet image of them all, or one PDF with a page for each (default png)')
+    parser.add_argument('--min-credits', type=float, default=MIN_CREDITS, help='fewest credits a schedule may have (default %(default)s)')
+    parser.add_argument('--max-credits', type=float, default=MAX_CREDITS, help='most credits a schedule may have (default %(default)s)')
+    parser.add_argument('--batch', metavar='SELECTIONS',
+                        help="a directory of students' selection files, or a manifest listing them, to run against the --catalog")
+    parser.add_argument('--catalog', default=INPUT, help='the course catalog for --batch, laid out like the input CSV (default %(default)s)')
+    parser.add_argument('--cache', nargs='?', const=CACHE_DIR, metavar='DIR',
+                        help='save every conflict-free schedule in DIR (default %(const)s), so the next run with the same input and credits skips the search')
+    parser.add_argument('--incremental', action='store_true',
+                        help='remember the input in the --cache, and next time only search for the schedules affected by changes to it')
+    parser.add_argument('--filters', nargs='*', choices=sorted(FILTERS), default=['saturday', 'sleepless'],
+                        help='leave out schedules with Saturday classes, sleepless nights, classes before 9 AM, or classes after 5 PM (default %(default)s)')
+    parser.add_argument('--blocked', action='append', default=[], metavar='TIMES',
+                        help="times to keep free, written like 'Days and times', e.g. 'MoWe 12:00PM - 1:30PM', can be given more than once")
+    parser.add_argument('--term', action='append', default=[], metavar='NAME=WEIGHT',
+                        help='rank by a weighted sum of these scoring terms instead of fullness alone, one of ' + ', '.join(sorted(TERMS)))
+    parser.add_argument('--progress', action='store_true', help='show how far along the search is, and about how long is left')
+    parser.add_argument('--stats', metavar='FILE', help='save counts and the time spent in each stage as JSON')
+    parser.add_argument('--memory', action='store_true', help='also measure the peak memory of each stage for --stats, which is slower')
+    parser.add_argument('--query', choices=['any', 'count', 'infeasible'],
+                        help='instead of making images, print any one schedule, how many schedules there are, or the sections in none of them')
+    args = parser.parse_args()
+
+    terms = None
+    if args.term != []:
+        terms = {}
+        for term in args.term:
+            name, _, weight = term.partition('=')
+            terms[name] = float(weight) if weight != '' else 1
+    pipeline = Pipeline(args.filters, terms, args.blocked)
+
+    snapshot = None
+    if args.incremental:
+        if args.cache is None:
+            args.cache = CACHE_DIR
+        snapshot = os.path.join(args.cache, 'snapshots')
+        if args.batch is None:
+            snapshot = os.path.join(snapshot, os.path.basename(INPUT) + '.json')
+
+    if args.batch is not None:
+        run_batch(args.catalog, args.batch, workers=args.workers, min_credits=args.min_credits, max_credits=args.max_credits, output=args.output,
+                  cache_dir=args.cache, snapshot=snapshot, pipeline=pipeline)
+        sys.exit()
+
+    # read in data from the CSV
+    input_lines = read_csv(INPUT)
+    # place the data into the nested classes structure
+    fall_2018 = ScheduleGenerator(input_lines)
+
+    if args.query == 'any':
+        schedule = fall_2018.any_schedule(args.min_credits, args.max_credits, pipeline)
+        print('There is no schedule that fits.' if schedule is None else str(schedule))
+        sys.exit()
+    if args.query == 'count':
+        # every choice among alternates is a schedule of its own here, though the images show them together
+        print(str(fall_2018.count_schedules(args.min_credits, args.max_credits, pipeline)) + ' schedules, '
+              + str(fall_2018.count_schedules(args.min_credits, args.max_credits, pipeline, alternates=False)) + ' not counting alternate sections')
+        sys.exit()
+    if args.query == 'infeasible':
+        for section in fall_2018.infeasible_sections(args.min_credits, args.max_credits, pipeline):
+            print(section)
+        sys.exit()
+    stats = None
+    if args.progress or args.stats is not None:
+        stats = Stats(progress=args.progress, memory=args.memory)
+    # generate, filter, and rank possible schedules
+    fall_2018.generate_schedules(workers=args.workers, min_credits=args.min_credits, max_credits=args.max_credits, output=args.output,
+                                 cache_dir=args.cache, snapshot=snapshot, pipeline=pipeline, stats=stats)
+    if args.stats is not None:
+        with open(args.stats, 'w', encoding='utf-8') as stats_file:
+            json.dump(stats.summary(), stats_file, indent=2)
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+from PIL import ImageFont
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import schedule_generator
+
+SAMPLE = os.path.join(ROOT, '_input csv.csv')
+
+@pytest.fixture
+def default_font(monkeypatch):
+    '''Draw with PIL's own font, since calibri.ttf isn't installed everywhere the tests run.'''
+    monkeypatch.setattr(schedule_generator, 'load_font', lambda: ImageFont.load_default())
@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+from conftest import SAMPLE
+from schedule_generator import run_batch
+
+SELECTIONS = {'alice': ['c\t\tMATH 16000 LEC', 'c\t\tSTAT 21300 LEC', 'c\tr\tCSCI 13500 LEC', '\t\tCSCI 13600 LAB'],
+              'bob': ['c\t\tMATH 16000 LEC', 'c\t\tBIOL 10000 LEC'],
+              'carol': ['c\t\tSTAT 21300 LEC', 'c\tr\tCSCI 13500 LEC', '\t\tCSCI 13600 LAB']}
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_batch_goes_on_past_a_bad_selection(tmp_path, default_font, workers):
+    selections = tmp_path / 'selections'
+    selections.mkdir()
+    for student, lines in SELECTIONS.items():
+        (selections / (student + '.csv')).write_text('\n'.join(['Corequisites?\tRequired?\tCourse code'] + lines) + '\n', encoding='utf-8')
+    output_root = str(tmp_path / 'output')
+
+    summary = run_batch(SAMPLE, str(selections), output_root, workers, min_credits=6, max_credits=12, k=2)
+    assert [f[0] for f in summary] == ['alice', 'bob', 'carol']
+    errors = {f[0]: f[3] for f in summary}
+    assert errors['alice'] is None and errors['carol'] is None
+    assert 'BIOL 10000 LEC' in errors['bob']
+    assert os.listdir(os.path.join(output_root, 'alice')) != [] and os.listdir(os.path.join(output_root, 'carol')) != []
+
+    with open(os.path.join(output_root, 'summary.tsv'), encoding='utf-8') as summary_file:
+        lines = summary_file.read().splitlines()
+    assert 'BIOL 10000 LEC' in lines[2]
+    assert lines[-1].endswith('1 failed')
@@ -0,0 +1,35 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import SAMPLE
+from schedule_generator import ScheduleGenerator, Stats, read_csv
+
+def test_cached_run_without_schedules(tmp_path, default_font):
+    # no combination of the sample reaches 100 credits, so the table is empty
+    generator = ScheduleGenerator(read_csv(SAMPLE))
+    cache_dir = str(tmp_path / 'cache')
+    snapshot = str(tmp_path / 'snapshot.json')
+    for n in range(2):
+        output_dir = str(tmp_path / ('output ' + str(n)))
+        generator.generate_schedules(min_credits=100, max_credits=120, output_dir=output_dir, cache_dir=cache_dir, snapshot=snapshot)
+        assert os.listdir(output_dir) == []
+
+    table = generator.schedule_table(100, 120)
+    assert all([len(f) == 0 for f in table.values()])
+    assert table['sections'].shape == (0, 0)
+
+# few enough combinations at first that they're split up among the workers, then enough that they aren't
+@pytest.mark.parametrize('min_credits, max_credits', [(16, 16), (12, 17), (9, 18)])
+def test_parallel_table_matches_serial(min_credits, max_credits):
+    generator = ScheduleGenerator(read_csv(SAMPLE))
+    table = generator.schedule_table(min_credits, max_credits)
+    stats = Stats()
+    parallel = generator.schedule_table(min_credits, max_credits, stats=stats, workers=3)
+    assert table.keys() == parallel.keys()
+    for name in table:
+        assert np.array_equal(table[name], parallel[name]), name
+    assert stats.counters['schedules scored'] == len(table['number'])
+    assert stats.counters['combinations searched'] == stats.counters['subsets feasible']
+    assert stats.fraction() == 1
@@ -0,0 +1,55 @@
+import copy
+import random
+
+import numpy as np
+import pytest
+
+from conftest import SAMPLE
+from benchmark import synthetic_catalog
+from schedule_generator import ScheduleGenerator, Pipeline, read_csv
+
+TIMES = ['MoWe 9:10AM - 10:00AM', 'TuTh 1:00PM - 2:15PM', 'MoWeFr 11:00AM - 11:50AM', 'Fr 6:00PM - 8:00PM', 'Sa 9:00AM - 10:00AM']
+PIPELINES = [Pipeline(), Pipeline(['saturday', 'sleepless', 'mornings', 'nights']), Pipeline(['sleepless'], {'midday': 1}, ['MoWe 12:00PM - 1:00PM'])]
+
+def edited(rows, seed):
+    '''A copy of the input rows with a few sections edited, added and removed.'''
+    chooser = random.Random(seed)
+    rows = copy.deepcopy(rows)
+    for x in range(4):
+        n = chooser.randrange(len(rows))
+        kind = chooser.choice(['edit', 'add', 'remove'])
+        if kind == 'edit':
+            rows[n]['Days and times'] = chooser.choice(TIMES)
+        elif kind == 'add':
+            row = dict(rows[n], **{'Corequisites?': '', 'Required?': '', 'Section': 'N' + str(x), 'Days and times': chooser.choice(TIMES)})
+            rows.insert(n + 1, row)
+        elif rows[n]['Corequisites?'] == '':
+            # the first row of a course starts it, so it's left in
+            del rows[n]
+    return rows
+
+def sorted_table(table):
+    '''The table with its rows in order of number, then sections, since only the order within a combination may differ.'''
+    order = np.lexsort([table['sections'][:, f] for f in range(table['sections'].shape[1] - 1, -1, -1)] + [table['number']])
+    return {name: column[order] for name, column in table.items()}
+
+@pytest.mark.parametrize('seed', range(6))
+@pytest.mark.parametrize('workers', [1, 2])
+def test_incremental_table_matches_full_build(tmp_path, seed, workers):
+    path = str(tmp_path / 'catalog.csv')
+    synthetic_catalog(path, courses=8, sections=5, slots=8, seed=seed)
+    for rows, min_credits, max_credits in [(read_csv(SAMPLE), 12, 17), (read_csv(path), 10, 14)]:
+        old = ScheduleGenerator(rows)
+        old_table = old.schedule_table(min_credits, max_credits)
+        generator = ScheduleGenerator(edited(rows, seed))
+        incremental = generator.schedule_table(min_credits, max_credits, previous=(old, old_table), workers=workers)
+        full = generator.schedule_table(min_credits, max_credits)
+
+        incremental = sorted_table(incremental)
+        full = sorted_table(full)
+        assert incremental.keys() == full.keys()
+        for name in full:
+            assert incremental[name].dtype == full[name].dtype, name
+            assert np.array_equal(incremental[name], full[name]), name
+        for pipeline in PIPELINES:
+            assert generator.rank_table(incremental, 5, pipeline) == generator.rank_table(full, 5, pipeline)
@@ -0,0 +1,40 @@
+import pytest
+
+from conftest import SAMPLE
+from benchmark import synthetic_catalog
+from schedule_generator import ScheduleGenerator, Pipeline, read_csv
+
+PIPELINES = [Pipeline(), Pipeline(['saturday', 'sleepless', 'mornings', 'nights']), Pipeline(['sleepless'], blocked=['MoWe 12:00PM - 1:30PM'])]
+
+def enumerated(generator, min_credits, max_credits, pipeline):
+    '''The schedules the search finds one at a time, as rows of section indices, without alternates.'''
+    blocked = pipeline.blocked_sections(generator).tolist()
+    return [row for number, credits, coreqs in generator.combinations(min_credits, max_credits)
+            for row in generator.search(coreqs, blocked=blocked, **pipeline.search_options())]
+
+def with_alternates(generator, rows):
+    total = 0
+    for row in rows:
+        product = 1
+        for f in row:
+            product *= 1 + len(generator.sections[f].alternates)
+        total += product
+    return total
+
+def test_count_schedules_on_sample_counts_alternates():
+    generator = ScheduleGenerator(read_csv(SAMPLE))
+    assert generator.count_schedules(9, 13) == 258
+    assert generator.count_schedules(9, 13, alternates=False) == 220
+
+@pytest.mark.parametrize('pipeline', PIPELINES)
+def test_queries_match_enumeration(tmp_path, pipeline):
+    path = str(tmp_path / 'catalog.csv')
+    synthetic_catalog(path, courses=8, sections=5, slots=8, seed=1)
+    for generator, min_credits, max_credits in [(ScheduleGenerator(read_csv(SAMPLE)), 12, 17), (ScheduleGenerator(read_csv(path)), 10, 14)]:
+        rows = enumerated(generator, min_credits, max_credits, pipeline)
+        assert generator.count_schedules(min_credits, max_credits, pipeline, alternates=False) == len(rows)
+        assert generator.count_schedules(min_credits, max_credits, pipeline) == with_alternates(generator, rows)
+        used = set([f for row in rows for f in row])
+        infeasible = generator.infeasible_sections(min_credits, max_credits, pipeline)
+        assert set([f.index for f in infeasible]) == set(range(len(generator.sections))) - used
+        assert (generator.any_schedule(min_credits, max_credits, pipeline) is None) == (rows == [])
@@ -0,0 +1,81 @@
+import itertools
+import os
+
+import numpy as np
+import pytest
+
+from conftest import SAMPLE
+from benchmark import synthetic_catalog
+from schedule_generator import ScheduleGenerator, Pipeline, Ranking, read_csv
+
+def test_ranking_keeps_best_k():
+    ranking = Ranking(2)
+    for seq, key in enumerate([0.5, 0.9, 0.1, 0.7]):
+        ranking.offer(key, (seq, ()), lambda: key)
+    assert ranking.results() == [0.9, 0.7]
+    assert ranking.cutoff() == 0.7
+
+def test_ranking_with_k_zero_keeps_nothing():
+    ranking = Ranking(0)
+    ranking.offer(0.5, (0, ()), lambda: 0.5)
+    ranking.merge(ranking)
+    assert ranking.results() == []
+    assert ranking.cutoff() is None
+
+@pytest.mark.parametrize('options', [{}, {'optimize': True}, {'workers': 2}])
+def test_generate_schedules_with_k_zero(tmp_path, default_font, options):
+    generator = ScheduleGenerator(read_csv(SAMPLE))
+    generator.generate_schedules(k=0, min_credits=12, max_credits=17, output_dir=str(tmp_path), **options)
+    assert os.listdir(tmp_path) == []
+
+PIPELINES = [Pipeline(), Pipeline([]), Pipeline(['saturday', 'sleepless', 'mornings', 'nights']), Pipeline(['sleepless'], {'fewer_credits': 1}),
+             Pipeline(['sleepless'], {'midday': 1, 'fullness': 0.5}, ['MoWe 12:00PM - 1:00PM'])]
+
+def brute_force(generator, min_credits, max_credits, pipeline):
+    '''Every schedule the Pipeline keeps, in the order itertools.product() generates them, stably sorted best first.
+    Returns the rows of section indices.'''
+    rows = []
+    numbers = []
+    credit_column = []
+    metric_columns = []
+    for number, credits, coreqs in generator.combinations(min_credits, max_credits):
+        found = [f for f in itertools.product(*coreqs) if not any([generator.conflicts[i, j] for i in f for j in f])]
+        if found == []:
+            continue
+        rows += found
+        numbers += [number] * len(found)
+        credit_column += [credits] * len(found)
+        metric_columns.append(generator.score(np.array(found)))
+    table = {'sections': np.array([f + (-1,) * (max(map(len, rows)) - len(f)) for f in rows]), 'number': np.array(numbers),
+             'credits': np.array(credit_column, dtype=float)}
+    for name in metric_columns[0]:
+        table[name] = np.concatenate([f[name] for f in metric_columns])
+    kept = pipeline.keep(table, pipeline.blocked_sections(generator))
+    keys = pipeline.key(table, kept)
+    order = np.argsort(-keys, kind='stable')
+    return [rows[f] for f in kept[order]]
+
+@pytest.mark.parametrize('pipeline', PIPELINES)
+def test_rankings_match_brute_force(tmp_path, pipeline):
+    path = str(tmp_path / 'catalog.csv')
+    synthetic_catalog(path, courses=7, sections=4, slots=8, seed=1)
+    generator = ScheduleGenerator(read_csv(path))
+    rows = brute_force(generator, 12, 17, pipeline)
+    k = 8
+    # the top k with ties going to the schedule generated first, and the bottom k, worst first, with ties going to the one generated last
+    preferred = rows[:k]
+    undesirable = rows[::-1][:k]
+
+    combinations = list(generator.combinations(12, 17))
+    rankings = [generator.rank(combinations, k, pipeline), generator.parallel_rank(2, combinations, k, pipeline)]
+    for ranked in rankings:
+        assert [f[0] for f in ranked[0].results()] == preferred
+        assert [f[0] for f in ranked[1].results()] == undesirable
+    if pipeline.bounded():
+        assert [f[0] for f in generator.rank(combinations, k, pipeline, optimize=True)[0].results()] == preferred
+        assert [f[0] for f in generator.parallel_rank(2, combinations, k, pipeline, optimize=True)[0].results()] == preferred
+
+    table = generator.schedule_table(12, 17)
+    ranked = generator.rank_table(table, k, pipeline)
+    assert [f[0] for f in ranked[0]] == preferred
+    assert [f[0] for f in ranked[1]] == undesirable
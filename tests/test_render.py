@@ -0,0 +1,29 @@
+import os
+from PIL import Image
+
+from conftest import SAMPLE
+from schedule_generator import ScheduleGenerator, Pipeline, read_csv
+
+def column_backgrounds(path):
+    '''The most common color in each day column, which is the column's tint over white.'''
+    image = Image.open(path).convert('RGB')
+    colors = []
+    for x in range(5):
+        left = int(150 * (0.875 + x * 1.375))
+        strip = image.crop((left, 150, left + 150, 1500))
+        colors.append(max(strip.getcolors(strip.width * strip.height))[1])
+    return colors
+
+def test_workers_tint_every_image_alike(tmp_path, default_font):
+    generator = ScheduleGenerator(read_csv(SAMPLE))
+    generator.generate_schedules(k=4, min_credits=12, max_credits=17, output_dir=str(tmp_path), workers=3)
+    paths = [os.path.join(tmp_path, f) for f in sorted(os.listdir(tmp_path))]
+    assert len(paths) == 8
+    assert all(column_backgrounds(f) == column_backgrounds(paths[0]) for f in paths)
+
+def test_saturday_schedules_are_drawn_when_allowed(tmp_path, default_font):
+    generator = ScheduleGenerator(read_csv(SAMPLE))
+    generator.generate_schedules(min_credits=12, max_credits=17, output_dir=str(tmp_path), pipeline=Pipeline(['sleepless']))
+    widths = set([Image.open(os.path.join(tmp_path, f)).width for f in os.listdir(tmp_path)])
+    # Monday to Friday pages, and pages with a Saturday column too
+    assert widths == set([int(8.5 * 150), int((8.5 + 1.375) * 150)])
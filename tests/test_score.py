@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from conftest import SAMPLE
+from benchmark import synthetic_catalog
+from schedule_generator import ScheduleGenerator, Schedule, read_csv
+
+def schedule_rows(generator, min_credits, max_credits, limit=3000):
+    '''Up to limit conflict-free schedules spread over all of them, Saturday classes and sleepless nights included.'''
+    table = generator.schedule_table(min_credits, max_credits)
+    picked = np.unique(np.linspace(0, len(table['number']) - 1, min(limit, len(table['number']))).astype(int))
+    return [f[f >= 0] for f in table['sections'][picked]]
+
+def assert_score_matches_calculate(generator, rows):
+    assert rows != []
+    for width in sorted(set([len(f) for f in rows])):
+        schedules = np.array([f for f in rows if len(f) == width])
+        metrics = generator.score(schedules)
+        for n, row in enumerate(schedules):
+            schedule = Schedule(tuple(generator.sections[f] for f in row))
+            schedule.calculate()
+            for name in metrics:
+                assert np.isclose(getattr(schedule, name), metrics[name][n]), \
+                    'score() and calculate() disagree on ' + name + ' for\n' + str(schedule)
+
+@pytest.mark.parametrize('min_credits, max_credits', [(9, 13), (12, 17), (16, 16)])
+def test_score_matches_calculate_on_sample(min_credits, max_credits):
+    generator = ScheduleGenerator(read_csv(SAMPLE))
+    assert_score_matches_calculate(generator, schedule_rows(generator, min_credits, max_credits))
+
+@pytest.mark.parametrize('seed, slots', [(0, 24), (1, 8), (2, 48)])
+def test_score_matches_calculate_on_synthetic_catalog(tmp_path, seed, slots):
+    path = str(tmp_path / 'catalog.csv')
+    synthetic_catalog(path, courses=8, sections=5, slots=slots, seed=seed)
+    generator = ScheduleGenerator(read_csv(path))
+    assert_score_matches_calculate(generator, schedule_rows(generator, 10, 14))
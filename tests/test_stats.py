@@ -0,0 +1,45 @@
+import json
+import os
+
+from conftest import SAMPLE
+from schedule_generator import ScheduleGenerator, Stats, read_csv
+
+def test_stats_without_progress(tmp_path, default_font):
+    # what --stats without --progress does
+    stats = Stats(progress=False)
+    generator = ScheduleGenerator(read_csv(SAMPLE))
+    returned = generator.generate_schedules(min_credits=12, max_credits=17, output_dir=str(tmp_path), stats=stats)
+
+    assert returned is stats
+    assert stats.progress is None
+    assert stats.counters['subsets feasible'] > 0
+    assert stats.counters['schedules scored'] >= stats.counters['schedules kept'] > 0
+    assert stats.counters['images written'] == len(os.listdir(tmp_path)) == 20
+    for stage in ['combinations', 'search', 'score', 'filter', 'rank', 'render', 'total']:
+        assert stats.seconds[stage] >= 0
+    json.dumps(stats.summary())
+
+def test_stats_progress_callback(tmp_path, default_font):
+    reports = []
+    stats = Stats(progress=reports.append, interval=0)
+    generator = ScheduleGenerator(read_csv(SAMPLE))
+    generator.generate_schedules(min_credits=12, max_credits=17, output_dir=str(tmp_path), output='sheet', stats=stats)
+
+    assert reports != [] and all(f is stats for f in reports)
+    assert stats.fraction() == 1
+    assert stats.counters['combinations searched'] == stats.counters['subsets feasible']
+
+def test_stats_of_incremental_table():
+    old = ScheduleGenerator(read_csv(SAMPLE))
+    old_table = old.schedule_table(12, 17)
+    rows = read_csv(SAMPLE)
+    rows[1]['Days and times'] = 'MoWe 11:00AM - 12:15PM'
+    generator = ScheduleGenerator(rows)
+
+    stats = Stats()
+    table = generator.schedule_table(12, 17, previous=(old, old_table), stats=stats)
+    # only the schedules with the changed section are searched for and scored, the rest are copied over
+    assert 0 < stats.counters['schedules scored'] < len(table['number'])
+    assert stats.seconds['search'] > 0 and stats.seconds['score'] > 0
+    assert stats.counters['combinations searched'] == stats.counters['subsets feasible']
+    assert stats.fraction() == 1